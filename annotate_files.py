@@ -10,21 +10,28 @@ Add a first-line header comment that records the *relative* path of each file
     /* tools/static/css/main.css */
 
 The header is inserted **after** any shebang (`#!`) line and skipped when the
-correct annotation already exists (those files are greyed out in the picker).
-Only files ticked in the Tk window are modified.
+correct annotation already exists: those files are left out of the picker,
+which is not shown at all when every file already has its header.  Only
+files ticked in the Tk window are modified.
 """
 
 from __future__ import annotations
 
+import base64
 import json
+import mmap
 import os
 import re
+import shlex
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple
 
-import tkinter as tk
+if TYPE_CHECKING:  # annotations only; Tk is imported where a window opens
+    import tkinter as tk
 
 # --------------------------------------------------------------------------- #
 #  Load config & blacklist helpers
@@ -41,8 +48,15 @@ if not os.path.exists(CONFIG_FILE):
     sys.exit(1)
 
 try:
-    with open(CONFIG_FILE, "r") as jf:
-        CFG = json.load(jf)
+    # orjson/ujson when installed, like the rest of the project
+    from setup.json_utils import load_file  # type: ignore
+except ImportError:  # pragma: no cover – only used outside the full project
+    def load_file(path: str):
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+
+try:
+    CFG = load_file(CONFIG_FILE)
 except Exception as exc:
     print(f"[annotate_files]  Error reading {CONFIG_FILE}: {exc}")
     sys.exit(1)
@@ -53,28 +67,66 @@ BLACKLIST: Dict[str, List[str]] = CFG.get("blacklist", {})
 #  Blacklist helpers (portable fallback if setup.* import fails)
 # --------------------------------------------------------------------------- #
 try:
-    from setup.content_setup import is_rel_path_blacklisted  # type: ignore
+    from setup.blacklist_utils import is_rel_path_blacklisted  # type: ignore
 except Exception:  # pragma: no cover – only used outside the full project
     def is_rel_path_blacklisted(rel_path: str, bl: List[str]) -> bool:
         rel_path = rel_path.strip("/\\")
         for b in bl:
             b = b.strip("/\\")
-            if (rel_path == b or rel_path.startswith(b + os.sep)
-                    or rel_path.startswith(b + "/")):
+            if rel_path == b or rel_path.startswith((b + os.sep, b + "/")):
                 return True
         return False
 
 
-def is_abs_path_blacklisted(abs_path: str) -> bool:
-    abs_path = os.path.abspath(abs_path)
-    for root, rels in BLACKLIST.items():
-        root = os.path.abspath(root)
-        if abs_path == root or abs_path.startswith(root + os.sep):
-            rel = os.path.relpath(abs_path, root).strip(os.sep)
-            if not rel or is_rel_path_blacklisted(rel, rels):
+def _norm_rel(rel: str) -> str:
+    return rel.strip("/\\").replace(os.sep, "/")
+
+
+# Normalised once at import: (absolute root without trailing sep,
+# frozenset of '/'-separated blacklisted relative paths).
+_BL_NORMALIZED: List[Tuple[str, frozenset]] = [
+    (os.path.abspath(root).rstrip(os.sep), frozenset(_norm_rel(b) for b in rels))
+    for root, rels in BLACKLIST.items()
+]
+
+
+def _rel_in_blacklist(rel: str, bl: frozenset) -> bool:
+    """
+    True when *rel* or one of its ancestors is in *bl* – at most one set
+    lookup per path component instead of a scan over the whole blacklist.
+    """
+    if rel in bl:
+        return True
+    i = rel.find("/")
+    while i != -1:
+        if rel[:i] in bl:
+            return True
+        i = rel.find("/", i + 1)
+    return False
+
+
+# Blacklist roots with their trailing separator, for the prefix test below
+_BL_ROOTS: List[Tuple[str, str, frozenset]] = [
+    (root, root + os.sep, bl) for root, bl in _BL_NORMALIZED
+]
+
+
+def _is_abs_blacklisted_fast(p: str) -> bool:
+    """
+    `is_abs_path_blacklisted` for a path that is already absolute and
+    normalised (tree walkers and `find` output) – skips the abspath().
+    """
+    for root, root_sep, bl in _BL_ROOTS:
+        if p == root or p.startswith(root_sep):
+            rel = _norm_rel(p[len(root):])
+            if not rel or _rel_in_blacklist(rel, bl):
                 return True
     return False
 
+
+def is_abs_path_blacklisted(abs_path: str) -> bool:
+    return _is_abs_blacklisted_fast(os.path.abspath(abs_path))
+
 # --------------------------------------------------------------------------- #
 #  Comment-syntax helpers
 # --------------------------------------------------------------------------- #
@@ -98,46 +150,53 @@ _COMMENT_PREFIX: Dict[str, str] = {
 }
 
 
+_SUFFIX: Dict[str, str] = {"/*": " */", "<!--": " -->"}
+
+# ext / special basename -> (prefix, suffix), materialised once at import
+_SYMBOLS: Dict[str, Tuple[str, str]] = {
+    key: (pref, _SUFFIX.get(pref, "")) for key, pref in _COMMENT_PREFIX.items()
+}
+# Fallback: safest is shell style so the file stays runnable
+_DEFAULT_SYMBOLS: Tuple[str, str] = ("#", "")
+
+
 def comment_symbols(fname: str) -> Tuple[str, str]:
     """
     Return (prefix, suffix) to wrap a single-line comment.  The suffix is
     empty for `#`, `//`, `--`; it is `' */'` for C-style and `' -->'`
-    for HTML/XML comments.
+    for HTML/XML comments.  Special basenames (Dockerfile, .bashrc) win
+    over the extension.
     """
     base = os.path.basename(fname)
-    ext = os.path.splitext(base)[1].lower()
-
-    if base == "Dockerfile":
-        return "#", ""
-
-    pref = _COMMENT_PREFIX.get(base) or _COMMENT_PREFIX.get(ext)
-    if pref in ("#",
-                "//",
-                "--"):
-        return pref, ""
-    if pref == "/*":
-        return "/*", " */"
-    if pref == "<!--":
-        return "<!--", " -->"
-    # Fallback: safest is shell style so the file stays runnable
-    return "#", ""
+    sym = _SYMBOLS.get(base)
+    if sym is not None:
+        return sym
+    return _SYMBOLS.get(os.path.splitext(base)[1].lower(), _DEFAULT_SYMBOLS)
 
 
 # --------------------------------------------------------------------------- #
 #  Header-detection helpers
 # --------------------------------------------------------------------------- #
-_RE_CACHE: Dict[str, re.Pattern[str]] = {}
+_RE_CACHE: Dict[str, re.Pattern[str]] = {}   # header text -> compiled regex
+
+_HDR_PREFIXES: Tuple[str, ...] = ("#", "//", "--", "/*", "<!--")
+_HDR_SUFFIXES: Tuple[str, ...] = ("*/", "-->")
+_HDR_PREFIXES_B: Tuple[bytes, ...] = tuple(p.encode() for p in _HDR_PREFIXES)
+_HDR_SUFFIXES_B: Tuple[bytes, ...] = tuple(p.encode() for p in _HDR_SUFFIXES)
 
 
 def _header_regex(text: str) -> re.Pattern[str]:
     """
     Compile (and cache) a regex that matches the correct annotation for *text*
-    regardless of leading/trailing whitespace.
+    regardless of leading/trailing whitespace.  Keyed by *text* itself so a
+    cache hit costs one dict probe, not an escape + format.
     """
-    pat = rf"^\s*(#|//|--|/\*|<!--)\s*{re.escape(text)}\s*(\*/|-->)?\s*$"
-    if pat not in _RE_CACHE:
-        _RE_CACHE[pat] = re.compile(pat)
-    return _RE_CACHE[pat]
+    rx = _RE_CACHE.get(text)
+    if rx is None:
+        rx = re.compile(
+            rf"^\s*(#|//|--|/\*|<!--)\s*{re.escape(text)}\s*(\*/|-->)?\s*$")
+        _RE_CACHE[text] = rx
+    return rx
 
 
 def file_has_header(lines: List[str], header_text: str) -> bool:
@@ -148,20 +207,74 @@ def file_has_header(lines: List[str], header_text: str) -> bool:
     idx = 1 if lines and lines[0].startswith("#!") else 0
     if idx >= len(lines):
         return False
-    return bool(_header_regex(header_text).match(lines[idx]))
+    line = lines[idx]
+    if header_text != header_text.strip():
+        # Surrounding whitespace is significant – only the regex gets it right
+        return bool(_header_regex(header_text).match(line))
+
+    # Fast path: plain string ops, equivalent to the regex for path headers
+    s = line.strip()
+    for pref in _HDR_PREFIXES:
+        if s.startswith(pref):
+            body = s[len(pref):]
+            break
+    else:
+        return False
+    for suf in _HDR_SUFFIXES:
+        if body.endswith(suf):
+            body = body[:-len(suf)]
+            break
+    return body.strip() == header_text
+
+
+def file_has_header_bytes(head: bytes, header_text: str) -> bool:
+    """
+    `file_has_header` for the raw leading bytes of a file: only the first
+    logical line is ever decoded, and only when the regex is needed.
+    """
+    lines = head.split(b"\n", 2)
+    idx = 1 if lines[0].startswith(b"#!") else 0
+    if idx >= len(lines):
+        return False
+    line = lines[idx]
+    if header_text != header_text.strip():
+        return bool(_header_regex(header_text).match(
+            line.decode("utf-8", errors="replace").rstrip("\r")))
+
+    s = line.strip()
+    for pref in _HDR_PREFIXES_B:
+        if s.startswith(pref):
+            body = s[len(pref):]
+            break
+    else:
+        return False
+    for suf in _HDR_SUFFIXES_B:
+        if body.endswith(suf):
+            body = body[:-len(suf)]
+            break
+    return body.strip() == header_text.encode("utf-8")
 
 
 # --------------------------------------------------------------------------- #
 #  Remote helpers
 # --------------------------------------------------------------------------- #
-def remote_find_all(ssh: str, root: str) -> List[str]:
+try:
+    # Shared with main.py's remote reader, so both reuse one master
+    from setup.ssh_utils import ssh_argv  # type: ignore
+except Exception:  # pragma: no cover – only used outside the full project
+    def ssh_argv(ssh: str) -> List[str]:
+        """Split the user's SSH command once into an argv list."""
+        return shlex.split(ssh)
+
+
+def remote_find_all(ssh_argv: List[str], root: str) -> List[str]:
     """
     Return a list of *files* (not directories) on the remote host.  We use
     `find -type f` so no extra stat calls are needed later.
     """
     try:
         proc = subprocess.run(
-            ssh.split() + ["find", root, "-type", "f", "-print"],
+            [*ssh_argv, "find", shlex.quote(root), "-type", "f", "-print"],
             capture_output=True, text=True, timeout=60
         )
         return proc.stdout.splitlines() if proc.returncode == 0 else []
@@ -169,23 +282,104 @@ def remote_find_all(ssh: str, root: str) -> List[str]:
         return []
 
 
-def remote_cat(ssh: str, fp: str, num_lines: int | None = None) -> str | None:
+def remote_cat(ssh_argv: List[str], fp: str, num_lines: int | None = None) -> str | None:
     """
     Read the entire remote file (or the first *num_lines* if given).
     """
     try:
         if num_lines is None:
-            cmd = ssh.split() + ["cat", fp]
+            cmd = [*ssh_argv, "cat", shlex.quote(fp)]
         else:
             # head -n handles CR/LF and is cheaper than full cat + split
-            cmd = ssh.split() + ["head", "-n", str(num_lines), fp]
+            cmd = [*ssh_argv, "head", "-n", str(num_lines), shlex.quote(fp)]
         proc = subprocess.run(cmd, capture_output=True, text=True)
         return proc.stdout if proc.returncode == 0 else None
     except Exception:
         return None
 
 
-def remote_write(ssh: str, fp: str, data: str) -> bool:
+_PEEK_SENTINEL = "__FILE__:"
+
+
+def _peek_loop(num_lines: int) -> str:
+    """Shell loop that prints a sentinel + the first lines of each path read."""
+    return (
+        f"printf '%s\\n' \"{_PEEK_SENTINEL}$f\"; "
+        f"head -n {int(num_lines)} -- \"$f\" 2>/dev/null; echo"
+    )
+
+
+def _split_peek_stream(out: str, num_lines: int,
+                       peeks: Dict[str, List[str]] | None = None
+                       ) -> Dict[str, List[str]]:
+    """
+    Split the sentinel-delimited output of `_peek_loop` back into
+    {path: [line, ...]}, preserving the order files were emitted in.
+    """
+    peeks = {} if peeks is None else peeks
+    current: List[str] | None = None
+    for line in out.splitlines():
+        if line.startswith(_PEEK_SENTINEL):
+            current = peeks.setdefault(line[len(_PEEK_SENTINEL):], [])
+        elif current is not None and len(current) < num_lines:
+            current.append(line)
+    return peeks
+
+
+def remote_cat_many(ssh_argv: List[str], paths: List[str],
+                    num_lines: int = 3) -> Dict[str, str]:
+    """
+    Return {path: first *num_lines* lines} for every remote *path*, using a
+    single SSH session instead of one `head` per file.  The path list is fed
+    on stdin so huge trees never hit the remote ARG_MAX; each file's output
+    is preceded by a sentinel line so the stream can be split back apart.
+    Unreadable files simply map to "".
+    """
+    if not paths:
+        return {}
+    script = f"while IFS= read -r f; do {_peek_loop(num_lines)}; done"
+    try:
+        proc = subprocess.run(
+            [*ssh_argv, "bash", "-c", shlex.quote(script)],
+            input="\n".join(paths) + "\n",
+            capture_output=True, text=True, errors="replace", timeout=120
+        )
+    except Exception:
+        return {p: "" for p in paths}
+
+    peeks = _split_peek_stream(proc.stdout, num_lines, {p: [] for p in paths})
+    return {p: "\n".join(lines) for p, lines in peeks.items()}
+
+
+def remote_enumerate_with_peek(ssh_argv: List[str], root: str,
+                               num_lines: int = 3
+                               ) -> List[Tuple[str, List[str]]] | None:
+    """
+    List every remote file under *root* together with its first *num_lines*
+    lines in one SSH round-trip – `find` and the header peek share a session,
+    so building the picker costs a single connection instead of N+1.
+    Returns None when *root* is not a directory (or SSH fails), which lets
+    the same call double as the existence check.
+    """
+    q = shlex.quote(root)
+    script = (
+        f"test -d {q} || exit 3; "
+        f"find {q} -type f -print0 | "
+        f"while IFS= read -r -d '' f; do {_peek_loop(num_lines)}; done"
+    )
+    try:
+        proc = subprocess.run(
+            [*ssh_argv, "bash", "-c", shlex.quote(script)],
+            capture_output=True, text=True, errors="replace", timeout=120
+        )
+    except Exception:
+        return None
+    if proc.returncode != 0:
+        return None
+    return list(_split_peek_stream(proc.stdout, num_lines).items())
+
+
+def remote_write(ssh_argv: List[str], fp: str, data: str) -> bool:
     """
     Atomically replace *fp* on the remote host with *data* using a temp file.
     """
@@ -193,18 +387,84 @@ def remote_write(ssh: str, fp: str, data: str) -> bool:
     try:
         # Create tmp
         if subprocess.run(
-            ssh.split() + ["bash", "-c", f"cat > {tmp}"],
+            [*ssh_argv, "bash", "-c", shlex.quote(f"cat > {shlex.quote(tmp)}")],
             input=data, text=True
         ).returncode != 0:
             return False
         # Move into place
         return subprocess.run(
-            ssh.split() + ["mv", tmp, fp]
+            [*ssh_argv, "mv", shlex.quote(tmp), shlex.quote(fp)]
         ).returncode == 0
     except Exception:
         return False
 
 
+def remote_read_many(ssh_argv: List[str], paths: List[str]) -> Dict[str, str]:
+    """
+    Read every remote file in *paths* over a single SSH session.  Contents
+    travel base64-encoded behind a sentinel line, so arbitrary bytes survive
+    the trip; files that cannot be read are absent from the result.
+    """
+    if not paths:
+        return {}
+    script = (
+        "while IFS= read -r f; do [ -r \"$f\" ] || continue; "
+        f"printf '%s\\n' \"{_PEEK_SENTINEL}$f\"; base64 < \"$f\"; done"
+    )
+    try:
+        proc = subprocess.run(
+            [*ssh_argv, "bash", "-c", shlex.quote(script)],
+            input="\n".join(paths) + "\n",
+            capture_output=True, text=True, errors="replace", timeout=300
+        )
+    except Exception:
+        return {}
+
+    out: Dict[str, str] = {}
+    for fp, b64 in _split_peek_stream(proc.stdout, sys.maxsize).items():
+        try:
+            out[fp] = base64.b64decode("".join(b64)).decode("utf-8",
+                                                           errors="replace")
+        except ValueError:
+            pass
+    return out
+
+
+def remote_write_many(ssh_argv: List[str], files: Dict[str, str]) -> Dict[str, bool]:
+    """
+    Replace every remote file in *files* ({path: new_text}) in one SSH
+    session.  Each file is decoded into a sibling temp file and `mv`-ed into
+    place (keeping the original mode), exactly like `remote_write`, and the
+    remote script reports DONE/FAIL per path.
+    """
+    if not files:
+        return {}
+    blocks = []
+    for fp, data in files.items():
+        b64 = base64.encodebytes(data.encode("utf-8")).decode("ascii")
+        blocks.append(
+            f"f={shlex.quote(fp)}; t=\"$f.__tmp_header\"\n"
+            "if base64 -d > \"$t\" <<'__EOF_ANNOT__'\n"
+            f"{b64}__EOF_ANNOT__\n"
+            "then chmod --reference=\"$f\" \"$t\" 2>/dev/null; "
+            "mv -- \"$t\" \"$f\" && echo \"DONE:$f\" || echo \"FAIL:$f\"\n"
+            "else rm -f -- \"$t\"; echo \"FAIL:$f\"; fi\n"
+        )
+    status = {fp: False for fp in files}
+    try:
+        proc = subprocess.run(
+            [*ssh_argv, "bash", "-s"],
+            input="".join(blocks), capture_output=True, text=True,
+            errors="replace"
+        )
+    except Exception:
+        return status
+    for line in proc.stdout.splitlines():
+        if line.startswith("DONE:") and line[5:] in status:
+            status[line[5:]] = True
+    return status
+
+
 # --------------------------------------------------------------------------- #
 #  Wizard – ask user for project root
 # --------------------------------------------------------------------------- #
@@ -224,6 +484,11 @@ def ask_root() -> Dict[str, str] | None:
         default_root = os.path.commonpath(dirs) if dirs else ""
 
     result: Dict[str, str] | None = None
+    # (root, ssh) -> listing gathered while verifying, reused by main()
+    prefetched: Dict[Tuple[str, str], List[Tuple[str, List[str]]]] = {}
+    # Tk is imported only by the GUI entry points, so the path, header and
+    # remote helpers (also used by gui.annotation_manager) load without it
+    import tkinter as tk
     w = tk.Tk()
     w.title("Annotation – Select Project Root")
 
@@ -269,6 +534,9 @@ def ask_root() -> Dict[str, str] | None:
         path = ent_root.get().strip()
         if not path:
             lbl_status.config(text="Path required.", fg="red"); return
+        # Normalised once, so the prefetched listing carries the same
+        # absolute paths build_header later checks against the root
+        path = os.path.abspath(path)
 
         if remote_flag.get() == 0:            # local
             ok = os.path.isdir(path)
@@ -277,8 +545,13 @@ def ask_root() -> Dict[str, str] | None:
             if not ssh_cmd:
                 lbl_status.config(text="SSH command required.", fg="red")
                 return
-            ok = subprocess.run(
-                ssh_cmd.split() + ["test", "-d", path]).returncode == 0
+            # One session both checks the directory and lists its files;
+            # the listing is handed to build_remote_items via the result.
+            files = remote_enumerate_with_peek(ssh_argv(ssh_cmd), path)
+            ok = files is not None
+            prefetched.clear()
+            if ok:
+                prefetched[(path, ssh_cmd)] = files
 
         lbl_status.config(
             text="Directory verified." if ok else "Directory not found.",
@@ -292,11 +565,15 @@ def ask_root() -> Dict[str, str] | None:
 
     def _proceed():
         nonlocal result
+        path = os.path.abspath(ent_root.get().strip())
+        ssh_cmd = ent_ssh.get().strip()
         result = {
-            "root": os.path.abspath(ent_root.get().strip()),
+            "root": path,
             "remote": bool(remote_flag.get()),
-            "ssh": ent_ssh.get().strip(),
+            "ssh": ssh_cmd,
         }
+        if result["remote"] and (path, ssh_cmd) in prefetched:
+            result["prefetched_files"] = prefetched[(path, ssh_cmd)]
         w.destroy()
 
     btn_go = tk.Button(btns, text="Proceed", width=10,
@@ -313,97 +590,190 @@ def ask_root() -> Dict[str, str] | None:
 # --------------------------------------------------------------------------- #
 def build_local_items(base: str) -> List[Dict]:
     items: List[Dict[str, object]] = []
-    base_depth = Path(base).as_posix().count('/')
-    for root, dirs, files in os.walk(base, topdown=True):
-        dirs[:] = [d for d in dirs
-                   if not is_abs_path_blacklisted(os.path.join(root, d))]
-        depth = Path(root).as_posix().count('/') - base_depth
-        for f in sorted(files):
-            fp = os.path.join(root, f)
-            if not is_abs_path_blacklisted(fp):
-                items.append({"path": fp, "indent": depth})
+    # Walking from base_abs only yields already-normalised absolute paths, so
+    # the fast blacklist check (no abspath per entry) is safe.
+    base_abs = os.path.abspath(base)
+
+    def _walk(d: str, depth: int) -> None:
+        try:
+            with os.scandir(d) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        subdirs: List[str] = []
+        for e in entries:
+            p = e.path
+            if _is_abs_blacklisted_fast(p):
+                continue
+            try:
+                is_dir = e.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                items.append({"path": p, "indent": depth})
+            elif not e.is_symlink():        # same as os.walk(followlinks=False)
+                subdirs.append(p)
+        for sd in subdirs:
+            _walk(sd, depth + 1)
+
+    _walk(base_abs, 0)
     return items
 
 
-def build_remote_items(ssh: str, base: str) -> List[Dict]:
+def build_remote_items(ssh_argv: List[str], base: str,
+                       prefetched: List[Tuple[str, List[str]]] | None = None
+                       ) -> List[Dict]:
+    """
+    Remote items carry their header peek (`"peek"`) so the GUI needs no
+    further SSH calls.  *prefetched* is the listing `ask_root` already pulled
+    while verifying the directory; without it the tree is enumerated here.
+    """
+    if prefetched is None:
+        prefetched = remote_enumerate_with_peek(ssh_argv, base) or []
     items: List[Dict[str, object]] = []
-    for full in remote_find_all(ssh, base):
-        if is_abs_path_blacklisted(full):
+    # `find` echoes paths rooted at *base*, already absolute and normalised
+    base_depth = Path(base).as_posix().count('/')
+    for full, peek in prefetched:
+        if _is_abs_blacklisted_fast(full):
             continue
-        depth = Path(full).as_posix().count('/') - Path(base).as_posix().count('/')
-        items.append({"path": full, "indent": depth})
+        depth = full.count('/') - base_depth
+        items.append({"path": full, "indent": depth, "peek": peek})
     return items
 
 
+_PEEK_BYTES = 4096
+
+
+def _mmap_head(f, n: int = _PEEK_BYTES) -> bytes:
+    """
+    Return up to *n* leading bytes of the open binary file *f*.  Regular
+    files are mapped read-only and sliced, skipping the buffered-reader
+    copy; anything mmap refuses (pipes, procfs, ...) falls back to read().
+    """
+    try:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), min(size, n), access=mmap.ACCESS_READ) as m:
+            return m[:]
+    except (OSError, ValueError):
+        return f.read(n)
+
+
+def _peek_bytes(path: str, n: int = _PEEK_BYTES) -> bytes:
+    """Leading bytes of *path* for header detection; b"" if unreadable."""
+    try:
+        with open(path, "rb") as f:
+            return _mmap_head(f, n)
+    except OSError:
+        return b""
+
+
+def find_unannotated(items, base_dir: str, remote: bool,
+                     ssh_argv: List[str]) -> List[Dict]:
+    """
+    Return the subset of *items* still missing their header, each tagged
+    with its '/'-separated `"rel"` path, so the picker only ever lists
+    actionable files (and is skipped entirely when there are none).
+    """
+    # Remote: items from build_remote_items already carry their peek;
+    # anything else is fetched in one SSH session.  Local: fan the small
+    # reads out over a thread pool so disk latency overlaps (GIL is
+    # released during read).
+    paths = [i["path"] for i in items]
+    if remote:
+        peek_map: Dict[str, List[str]] = {
+            i["path"]: i["peek"] for i in items if "peek" in i
+        }
+        missing = [p for p in paths if p not in peek_map]
+        if missing:
+            peek_map.update(
+                (p, txt.splitlines())
+                for p, txt in remote_cat_many(ssh_argv, missing, 3).items())
+    else:
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            peek_map = dict(zip(paths, ex.map(_peek_bytes, paths)))
+    # Local peeks stay raw bytes and are matched without decoding
+    has_header = file_has_header if remote else file_has_header_bytes
+    no_peek = [] if remote else b""
+
+    # Plain string slicing: a Path + relative_to per item dominated this
+    # loop on large trees.
+    base_str = os.path.abspath(base_dir)
+    base_prefix = base_str.rstrip(os.sep) + os.sep
+    cut = len(base_prefix)
+    root_name = os.path.basename(base_str)
+    todo: List[Dict] = []
+    for itm in items:
+        p = itm["path"]
+        rel = p[cut:] if p.startswith(base_prefix) else \
+            os.path.relpath(p, base_str)
+        if os.sep != "/":
+            rel = rel.replace(os.sep, "/")
+        if not has_header(peek_map.get(p, no_peek), f"{root_name}/{rel}"):
+            itm["rel"] = rel
+            todo.append(itm)
+    return todo
+
+
 # --------------------------------------------------------------------------- #
 #  Tk file-selection GUI (auto-sizes to content)
 # --------------------------------------------------------------------------- #
 class SelectionGUI:
-    def __init__(self,
-                 master: tk.Tk,
-                 items,
-                 base_dir: str,
-                 remote: bool,
-                 ssh: str):
+    _BOX = {False: "☐", True: "☑"}
+    # Row indents by depth, built once rather than multiplied out per row
+    _INDENTS = tuple("    " * i for i in range(64))
+
+    def __init__(self, master: "tk.Tk", items, base_dir: str):
+        """*items* are the entries returned by `find_unannotated`."""
+        import tkinter as tk
+        import tkinter.font as tkfont
+        from tkinter import ttk
+
         self.master = master
         self.selected: List[str] = []
-        self.vars: Dict[str, tk.BooleanVar] = {}
+        self.selected_paths: Set[str] = set()
+        self.selectable: List[str] = []      # display order, for finish()
 
         self.base_dir = Path(base_dir)
         self.root_name = self.base_dir.name
-        self.remote = remote
-        self.ssh = ssh
 
         master.title("Select files to annotate")
 
-        # ------------ scrollable canvas scaffold ---------------------------
-        self.canvas = tk.Canvas(master, borderwidth=0, highlightthickness=0)
-        vscroll = tk.Scrollbar(master, orient="vertical",
-                               command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=vscroll.set)
+        # ------------ one virtualised Treeview instead of N Checkbuttons ---
+        # Treeview only draws the visible rows, so opening the picker on a
+        # 50k-file tree costs one insert per file rather than one widget.
+        body = tk.Frame(master)
+        body.pack(side="top", fill="both", expand=True)
+        self.tree = ttk.Treeview(body, columns=("selected",),
+                                 show="tree headings", selectmode="none")
+        self.tree.heading("#0", text="File", anchor="w")
+        self.tree.heading("selected", text="Annotate")
+        self.tree.column("selected", width=70, stretch=False, anchor="center")
+        vscroll = ttk.Scrollbar(body, orient="vertical",
+                                command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vscroll.set)
 
         vscroll.pack(side="right", fill="y")
-        self.canvas.pack(side="left", fill="both", expand=True)
+        self.tree.pack(side="left", fill="both", expand=True)
 
-        frame = tk.Frame(self.canvas)
-        self.canvas.create_window((0, 0), window=frame, anchor="nw")
-
-        # Cross-platform mouse wheel
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
-        self.canvas.bind_all("<Button-4>",  self._on_mousewheel)
-        self.canvas.bind_all("<Button-5>",  self._on_mousewheel)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<space>", self._on_space)
 
         # ------------ populate the list ------------------------------------
+        widest = ""
+        indents = self._INDENTS
         for itm in items:
-            rel = Path(itm["path"]).relative_to(self.base_dir).as_posix()
-            indent = "    " * itm["indent"]
-            disp   = f"{indent}{rel}"
-            header = f"{self.root_name}/{rel}"
-
-            # Peek first few lines
-            if remote:
-                peek = (remote_cat(ssh, itm["path"], 3) or "").splitlines()
-            else:
-                try:
-                    with open(itm["path"], "r", encoding="utf-8",
-                              errors="replace") as f:
-                        peek = [next(f).rstrip("\n") for _ in range(3)]
-                except Exception:
-                    peek = []
-
-            already = file_has_header(peek, header)
-
-            if already:
-                tk.Checkbutton(frame, text=disp, state=tk.DISABLED,
-                               fg="grey", anchor="w")\
-                    .pack(anchor="w", padx=5)
-            else:
-                var = tk.BooleanVar()
-                self.vars[itm["path"]] = var
-                cb = tk.Checkbutton(frame, text=disp, variable=var,
-                                    anchor="w", highlightthickness=0, bd=0)
-                cb.bind("<Double-1>", lambda _e, v=var: v.set(not v.get()))
-                cb.pack(anchor="w", padx=5)
+            p = itm["path"]
+            depth = itm["indent"]
+            indent = indents[depth] if depth < len(indents) else "    " * depth
+            disp = indent + itm["rel"]
+            if len(disp) > len(widest):
+                widest = disp
+            self.tree.insert("", "end", iid=p, text=disp,
+                             values=(self._BOX[False],))
+            self.selectable.append(p)
 
         # ------------ buttons ----------------------------------------------
         btns = tk.Frame(master)
@@ -414,16 +784,23 @@ class SelectionGUI:
                   command=self.cancel).pack(side="left", padx=4)
 
         # ------------ final sizing pass ------------------------------------
+        # Size from the longest label and row count instead of asking Tk to
+        # lay out every row.
+        font = tkfont.nametofont("TkDefaultFont")
+        list_w = font.measure(widest) + 40
+        self.tree.column("#0", width=list_w, stretch=True)
+        row_h = font.metrics("linespace") + 4
+        self.tree.configure(height=max(1, min(len(items), 40)))
+
         master.update_idletasks()            # let Tk compute real sizes
 
         scr_w, scr_h = master.winfo_screenwidth(), master.winfo_screenheight()
 
-        list_w  = frame.winfo_reqwidth()                 # file list
         btn_w   = btns.winfo_reqwidth()                  # Finish / Cancel
         sb_w    = vscroll.winfo_reqwidth()               # scrollbar
 
-        content_w = max(list_w + sb_w, btn_w) + 300       # + padding
-        content_h = frame.winfo_reqheight() + btns.winfo_reqheight() + 24
+        content_w = max(list_w + 70 + sb_w, btn_w) + 40   # + padding
+        content_h = (len(items) + 1) * row_h + btns.winfo_reqheight() + 24
 
         win_w = min(content_w, scr_w - 40)
         win_h = min(content_h, scr_h - 80)
@@ -435,16 +812,25 @@ class SelectionGUI:
     # ------------------------------------------------------------------- #
     #  helpers
     # ------------------------------------------------------------------- #
-    def _on_mousewheel(self, event):
-        if event.num == 4:                # X11 up
-            self.canvas.yview_scroll(-1, "units")
-        elif event.num == 5:              # X11 down
-            self.canvas.yview_scroll(1, "units")
-        else:                             # Win / macOS
-            self.canvas.yview_scroll(-1 * int(event.delta / 120), "units")
+    def _toggle(self, iid: str):
+        if not iid:
+            return
+        on = iid not in self.selected_paths
+        if on:
+            self.selected_paths.add(iid)
+        else:
+            self.selected_paths.discard(iid)
+        self.tree.set(iid, "selected", self._BOX[on])
+
+    def _on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) in ("tree", "cell"):
+            self._toggle(self.tree.identify_row(event.y))
+
+    def _on_space(self, _event):
+        self._toggle(self.tree.focus())
 
     def finish(self):
-        self.selected = [p for p, v in self.vars.items() if v.get()]
+        self.selected = [p for p in self.selectable if p in self.selected_paths]
         self.master.destroy()
 
     def cancel(self):
@@ -458,50 +844,178 @@ class SelectionGUI:
 #  Header construction & annotation helpers
 # --------------------------------------------------------------------------- #
 def build_header(base: Path, file_path: Path) -> str:
-    return f"{base.name}/{file_path.relative_to(base).as_posix()}"
+    base_s = os.fspath(base).rstrip(os.sep)
+    fp = os.fspath(file_path)
+    if fp.startswith(base_s + os.sep):
+        rel = fp[len(base_s) + 1:]
+        if os.sep != "/":
+            rel = rel.replace(os.sep, "/")
+    else:
+        # Unnormalised input – let pathlib decide (raises if outside *base*)
+        rel = Path(fp).relative_to(base).as_posix()
+    return f"{os.path.basename(base_s)}/{rel}"
+
+
+_SYNC_BATCH_MIN = 100     # above this many files, one os.sync() beats N fsyncs
 
 
-def annotate_local(fp: Path, base: Path) -> bool:
+def annotate_local(fp: Path, base: Path,
+                   pending: List[Tuple[Path, Path, str]] | None = None) -> bool:
+    """
+    Prepend the header by streaming the original bytes into a temp file
+    beside the file and `os.replace`-ing it over the original: memory use is
+    constant and the body is copied verbatim (no decode / re-encode
+    round-trip).  A symlinked *fp* is resolved first, so its target is
+    annotated and the link kept; a file with several hard links is
+    rewritten in place instead, since a rename would split it from them.
+
+    The temp file is fsync'ed before the rename.  When *pending* is given,
+    both the fsync and the rename are deferred: (tmp, target, header) is
+    appended and `commit_pending` finishes the batch (and reports it) after
+    a single `os.sync()`.
+    """
     hdr = build_header(base, fp)
     pref, suf = comment_symbols(fp.name)
+    real = Path(os.path.realpath(fp))
+    tmp = real.with_name(real.name + ".__tmp_header")
     try:
-        lines = fp.read_text(encoding="utf-8", errors="replace")\
-                  .splitlines(keepends=True)
+        src = open(real, "rb")
+        nlink = os.fstat(src.fileno()).st_nlink
     except Exception as e:
         print(f"  ✗ {hdr} (read error: {e})")
         return False
 
-    if file_has_header([ln.rstrip('\n') for ln in lines[:3]], hdr):
-        return False
+    with src:
+        # Only the first few KB decide whether anything needs doing; an
+        # already-annotated file is never read past this point.
+        head = _mmap_head(src)
+        if file_has_header_bytes(head, hdr):
+            return False
+        src.seek(len(head))
+
+        hdr_line = f"{pref} {hdr}{suf}\n".encode("utf-8")
+        if head.startswith(b"#!"):
+            nl = head.find(b"\n")
+            if nl < 0 and len(head) == _PEEK_BYTES:
+                head += src.readline()          # absurdly long shebang
+                nl = head.find(b"\n")
+            if nl < 0:
+                out = [head + b"\n", hdr_line]
+                head = b""
+            else:
+                out = [head[:nl + 1], hdr_line]
+                head = head[nl + 1:]
+        else:
+            out = [hdr_line]
+        if nlink > 1:
+            return _rewrite_in_place(src, real, out, head, hdr)
+        try:
+            with open(tmp, "wb") as dst:
+                dst.writelines(out)
+                dst.write(head)
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+                if pending is None:
+                    dst.flush()
+                    os.fsync(dst.fileno())
+            shutil.copymode(real, tmp)
+            if pending is not None:
+                pending.append((tmp, real, hdr))
+                return True
+            os.replace(tmp, real)
+        except Exception as e:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            print(f"  ✗ {hdr} (write error: {e})")
+            return False
+
+    print(f"  ✔ {hdr}")
+    return True
 
-    idx = 1 if lines and lines[0].startswith("#!") else 0
-    lines.insert(idx, f"{pref} {hdr}{suf}\n")
 
+def _rewrite_in_place(src, real: Path, out: List[bytes], head: bytes,
+                      hdr: str) -> bool:
+    """
+    Fallback for hard-linked files: read the rest of *src* and write the
+    annotated bytes back into the same inode, which every link shares.
+    Not crash-safe like the rename, but links, owner and ACLs survive.
+    """
     try:
-        fp.write_text("".join(lines), encoding="utf-8")
-        print(f"  ✔ {hdr}")
-        return True
+        body = head + src.read()
+        with open(real, "r+b") as dst:
+            dst.writelines(out)
+            dst.write(body)
+            dst.flush()
+            os.fsync(dst.fileno())
     except Exception as e:
         print(f"  ✗ {hdr} (write error: {e})")
         return False
+    print(f"  ✔ {hdr}")
+    return True
 
 
-def annotate_remote(fp: str, base: str, ssh: str) -> bool:
-    hdr = build_header(Path(base), Path(fp))
-    txt = remote_cat(ssh, fp)
-    if txt is None:
-        print(f"  ✗ {hdr} (read failure)")
-        return False
+def commit_pending(pending: List[Tuple[Path, Path, str]]) -> int:
+    """
+    Flush every deferred temp file to disk with one `os.sync()`, then rename
+    each over its original.  Returns how many files were replaced; *pending*
+    is left empty.
+    """
+    os.sync()
+    done = 0
+    for tmp, fp, hdr in pending:
+        try:
+            os.replace(tmp, fp)
+        except OSError as e:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            print(f"  ✗ {hdr} (rename error: {e})")
+        else:
+            print(f"  ✔ {hdr}")
+            done += 1
+    pending.clear()
+    return done
 
+
+def discard_pending(pending: List[Tuple[Path, Path, str]]) -> None:
+    """Remove the temp files of a batch that will not be committed."""
+    for tmp, _fp, _hdr in pending:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+    pending.clear()
+
+
+def _with_header(txt: str, hdr: str, fname: str) -> str | None:
+    """
+    Return *txt* with the annotation for *hdr* inserted after any shebang,
+    or None when the correct header is already present.
+    """
     lines = txt.splitlines(keepends=True)
     if file_has_header([ln.rstrip('\n') for ln in lines[:3]], hdr):
-        return False
+        return None
 
-    pref, suf = comment_symbols(fp)
+    pref, suf = comment_symbols(fname)
     idx = 1 if lines and lines[0].startswith("#!") else 0
     lines.insert(idx, f"{pref} {hdr}{suf}\n")
+    return "".join(lines)
+
+
+def annotate_remote(fp: str, base: str, ssh_argv: List[str]) -> bool:
+    hdr = build_header(Path(base), Path(fp))
+    txt = remote_cat(ssh_argv, fp)
+    if txt is None:
+        print(f"  ✗ {hdr} (read failure)")
+        return False
+
+    new = _with_header(txt, hdr, fp)
+    if new is None:
+        return False
 
-    if remote_write(ssh, fp, "".join(lines)):
+    if remote_write(ssh_argv, fp, new):
         print(f"  ✔ {hdr}")
         return True
 
@@ -509,6 +1023,36 @@ def annotate_remote(fp: str, base: str, ssh: str) -> bool:
     return False
 
 
+def annotate_remote_batch(ssh_argv: List[str], base: str,
+                          paths: List[str]) -> int:
+    """
+    Annotate many remote files with two SSH sessions in total (one bulk read,
+    one bulk write) instead of three per file.  Returns the number changed.
+    """
+    base_p = Path(base)
+    contents = remote_read_many(ssh_argv, paths)
+
+    pending: Dict[str, str] = {}
+    headers: Dict[str, str] = {}
+    for fp in paths:
+        hdr = headers[fp] = build_header(base_p, Path(fp))
+        if fp not in contents:
+            print(f"  ✗ {hdr} (read failure)")
+            continue
+        new = _with_header(contents[fp], hdr, fp)
+        if new is not None:
+            pending[fp] = new
+
+    changed = 0
+    for fp, ok in remote_write_many(ssh_argv, pending).items():
+        if ok:
+            print(f"  ✔ {headers[fp]}")
+            changed += 1
+        else:
+            print(f"  ✗ {headers[fp]} (write failure)")
+    return changed
+
+
 # --------------------------------------------------------------------------- #
 #  Main
 # --------------------------------------------------------------------------- #
@@ -519,25 +1063,45 @@ def main() -> None:
 
     base = info["root"]
     remote = info["remote"]
-    ssh = info["ssh"]
+    ssh = ssh_argv(info["ssh"]) if remote else []
 
     print("Building file list …")
-    items = build_remote_items(ssh, base) if remote else build_local_items(base)
+    items = (build_remote_items(ssh, base, info.get("prefetched_files"))
+             if remote else build_local_items(base))
+
+    todo = find_unannotated(items, base, remote, ssh)
+    if not todo:
+        print(f"Nothing to annotate – all {len(items)} file(s) already "
+              "carry their header.")
+        return
 
+    import tkinter as tk
     root = tk.Tk()
-    gui = SelectionGUI(root, items, base, remote, ssh)
+    gui = SelectionGUI(root, todo, base)
     root.mainloop()
 
     print("\nAnnotating …")
     changed = 0
     if remote:
-        for p in gui.selected:
-            if annotate_remote(p, base, ssh):
-                changed += 1
+        changed = annotate_remote_batch(ssh, base, gui.selected)
     else:
-        for p in gui.selected:
-            if annotate_local(Path(p), Path(base)):
-                changed += 1
+        # Large runs defer durability to one os.sync() instead of an fsync
+        # per file (os.sync is POSIX-only).
+        batch = len(gui.selected) > _SYNC_BATCH_MIN and hasattr(os, "sync")
+        pending: List[Tuple[Path, Path, str]] | None = [] if batch else None
+        try:
+            for p in gui.selected:
+                if annotate_local(Path(p), Path(base), pending):
+                    changed += 1
+            if pending:
+                # Those were counted as annotated before their rename
+                deferred = len(pending)
+                changed += commit_pending(pending) - deferred
+        finally:
+            # Interrupted before (or during) the commit: don't leave
+            # .__tmp_header files behind in the user's tree
+            if pending:
+                discard_pending(pending)
 
     print(f"Done – {changed} file(s) updated.")
 
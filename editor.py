@@ -1,9 +1,9 @@
 # gpt_helper/dev/editor.py
 import os
+import sys
+import signal
 import platform
 import subprocess
-import tkinter as tk
-from tkinter import scrolledtext
 
 # ---------------------------------------------------------------------------
 # open_in_editor  – launch external editor, then delete temp file
@@ -16,18 +16,60 @@ def open_in_editor(file_path: str, editor: str | None = None):
     deletes the file after the editor window is closed.
     """
     if editor is None:
-        match platform.system():
-            case "Windows": editor = "notepad"
-            case "Darwin":  editor = "open -e"
-            case _:         editor = "mousepad"
+        editor = _default_editor()
     try:
-        subprocess.call(editor.split() + [file_path])
+        _run_and_wait(editor.split() + [file_path])
     finally:
         try:
             os.remove(file_path)
         except Exception as e:
             print(f"Error deleting temporary file {file_path}: {e}")
 
+def exec_in_editor(file_path: str, editor: str | None = None):
+    """
+    Like open_in_editor, but for callers with nothing left to do: on POSIX
+    the process is replaced by a small shell that runs the editor and then
+    deletes the file, so the interpreter is not kept resident for the whole
+    editing session. Does not return there; elsewhere (or if the exec
+    fails) it falls back to open_in_editor.
+    """
+    if editor is None:
+        editor = _default_editor()
+    if os.name == "posix":
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            # $0 is the file to delete, "$@" the editor command plus the file
+            os.execvp("sh", ["sh", "-c", '"$@"; rm -f -- "$0"',
+                             file_path, *editor.split(), file_path])
+        except OSError:
+            pass
+    open_in_editor(file_path, editor)
+
+def _run_and_wait(argv: list[str]):
+    """
+    Run *argv* (looked up on PATH) and wait for it, like subprocess.call.
+    Uses posix_spawn where available: the child is started without first
+    duplicating this process, whose address space holds Tk when a GUI ran.
+    """
+    if not hasattr(os, "posix_spawnp"):
+        subprocess.call(argv)
+        return
+    pid = os.posix_spawnp(argv[0], argv, os.environ)
+    try:
+        os.waitpid(pid, 0)
+    except BaseException:
+        # As subprocess.call does on e.g. Ctrl-C: don't leave it running
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        raise
+
+def _default_editor() -> str:
+    match platform.system():
+        case "Windows": return "notepad"
+        case "Darwin":  return "open -e"
+        case _:         return "mousepad"
+
 # ---------------------------------------------------------------------------
 # edit_file_tk  – basic Tkinter editor for existing on-disk file
 # ---------------------------------------------------------------------------
@@ -37,6 +79,10 @@ def edit_file_tk(filepath: str):
     Fallback Tkinter-based editor that loads an existing file,
     allows inline editing, and saves changes back to disk.
     """
+    # Imported here so CLI paths that never open this editor skip loading Tk
+    import tkinter as tk
+    from tkinter import scrolledtext
+
     win = tk.Tk()
     win.title(f"Editing {os.path.basename(filepath)}")
 
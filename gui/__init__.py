@@ -2,10 +2,31 @@
 """
 Improved GUI package for GPT Helper
 """
-# Import standard components (now includes all enhanced functionality)
-from .main import gui_selection, ImprovedFileSelectionGUI, EnhancedFileSelectionGUI, enhanced_gui_selection
-from .file_selection import EnhancedTreeWidget, ImprovedFileSelectionWidget
-from .base import load_selection_state, save_selection_state, remote_cache
+import importlib
+
+# Components are resolved lazily (PEP 562) so importing the package does not
+# pull in Tk, every tab module and the remote cache until something is used.
+_LAZY = {
+    'gui_selection': '.main',
+    'ImprovedFileSelectionGUI': '.main',
+    'EnhancedFileSelectionGUI': '.main',
+    'enhanced_gui_selection': '.main',
+    'EnhancedTreeWidget': '.file_selection',
+    'ImprovedFileSelectionWidget': '.file_selection',
+    'load_selection_state': '.base',
+    'save_selection_state': '.base',
+    'remote_cache': '.base',
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 # Export all components
 __all__ = [
@@ -18,4 +39,4 @@ __all__ = [
     'load_selection_state',
     'save_selection_state',
     'remote_cache',
-]
\ No newline at end of file
+]
@@ -4,7 +4,6 @@ Additional files management - files included at the end of Step 1
 Enhanced with pagination and lazy loading for remote directories
 """
 import os
-import json
 import subprocess
 import threading
 import traceback
@@ -12,7 +11,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 from collections import defaultdict
-from setup.content_setup import is_rel_path_blacklisted
+from setup.blacklist_utils import blacklist_matcher, relpath_from
+from setup.json_utils import dump_file
 from .base import setup_tree_tags
 
 class CheckboxTreeview(ttk.Treeview):
@@ -550,10 +550,11 @@ class AdditionalFilesEditor(ttk.Frame):
         
         # Populate selected files list
         self.selected_listbox.delete(0, tk.END)
+        relpath = relpath_from(base_dir)
         for filepath in additional_files:
             # Show relative path if possible
             try:
-                rel_path = os.path.relpath(filepath, base_dir)
+                rel_path = relpath(filepath)
                 self.selected_listbox.insert(tk.END, rel_path)
             except:
                 self.selected_listbox.insert(tk.END, filepath)
@@ -670,7 +671,8 @@ class AdditionalFilesEditor(ttk.Frame):
                 return
             
             print("DEBUG: SSH connection test successful")
-            blacklist_items = self.config.get("blacklist", {}).get(base_dir, [])
+            # Compiled once per listing, not re-scanned per entry
+            is_blacklisted = blacklist_matcher(self.config.get("blacklist", {}).get(base_dir, []))
             
             # Get current additional files for marking
             current_additional = set(self.config.get("project_output_files", []))
@@ -714,7 +716,7 @@ class AdditionalFilesEditor(ttk.Frame):
                         rel_path = fname  # For root level, relative path is just the name
                         
                         # Skip blacklisted
-                        if is_rel_path_blacklisted(rel_path, blacklist_items):
+                        if is_blacklisted(rel_path):
                             continue
                         
                         is_dir = perms.startswith('d')
@@ -744,7 +746,7 @@ class AdditionalFilesEditor(ttk.Frame):
                         fname = line.lstrip('./')
                         full_path = os.path.join(base_dir, fname)
                         
-                        if is_rel_path_blacklisted(fname, blacklist_items):
+                        if is_blacklisted(fname):
                             continue
                         
                         # Test if directory
@@ -846,7 +848,7 @@ class AdditionalFilesEditor(ttk.Frame):
     def _load_local_contents_for_root(self, root_id, base_dir):
         """Load local root directory contents immediately"""
         print(f"DEBUG: _load_local_contents_for_root called for {base_dir}")
-        blacklist_items = self.config.get("blacklist", {}).get(base_dir, [])
+        is_blacklisted = blacklist_matcher(self.config.get("blacklist", {}).get(base_dir, []))
         
         # Get current additional files for marking
         current_additional = set(self.config.get("project_output_files", []))
@@ -855,56 +857,11 @@ class AdditionalFilesEditor(ttk.Frame):
                 current_additional.update(d.get("output_files", []))
         
         try:
-            entries = sorted(os.listdir(base_dir))
-            print(f"DEBUG: Found {len(entries)} entries in {base_dir}")
-            
-            # Separate directories and files
-            dirs = []
-            files = []
-            
-            for entry in entries:
-                full_path = os.path.join(base_dir, entry)
-                rel_path = entry  # For root level, relative path is just the name
-                
-                # Skip blacklisted items
-                if is_rel_path_blacklisted(rel_path, blacklist_items):
-                    continue
-                
-                try:
-                    if os.path.isdir(full_path):
-                        # Count contents
-                        try:
-                            contents = os.listdir(full_path)
-                            file_count = sum(1 for f in contents if os.path.isfile(os.path.join(full_path, f)))
-                            dir_count = len(contents) - file_count
-                        except:
-                            file_count = 0
-                            dir_count = 0
-                            
-                        dirs.append({
-                            'name': entry,
-                            'path': full_path,
-                            'type': 'directory',
-                            'is_selected': False,  # Directories aren't selected
-                            'file_count': file_count,
-                            'dir_count': dir_count
-                        })
-                    else:
-                        files.append({
-                            'name': entry,
-                            'path': full_path,
-                            'type': 'file',
-                            'is_selected': full_path in current_additional
-                        })
-                except:
-                    continue
+            dirs, files = self._scan_local_entries(base_dir, "", is_blacklisted,
+                                                   current_additional)
             
             print(f"DEBUG: {len(dirs)} directories, {len(files)} files after filtering")
             
-            # Sort
-            dirs.sort(key=lambda x: x['name'].lower())
-            files.sort(key=lambda x: x['name'].lower())
-            
             all_items = dirs + files
             
             # Use pagination if needed
@@ -936,6 +893,56 @@ class AdditionalFilesEditor(ttk.Frame):
                                      text=f"[Error: {str(e)}]", 
                                      tags=["error"])
     
+    def _scan_local_entries(self, dir_path, rel_prefix, is_blacklisted, current_additional):
+        """
+        List *dir_path* into (dirs, files) item dicts, sorted by name, leaving
+        out blacklisted entries. os.scandir reports each entry's type from
+        the directory listing itself, so neither the listing nor a
+        directory's item count (one more scandir of it) stats every entry.
+        """
+        dirs = []
+        files = []
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                name = entry.name
+                if is_blacklisted(rel_prefix + name):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    # Count contents
+                    file_count = dir_count = 0
+                    try:
+                        with os.scandir(entry.path) as sub:
+                            for child in sub:
+                                if child.is_file():
+                                    file_count += 1
+                                else:
+                                    dir_count += 1
+                    except OSError:
+                        file_count = dir_count = 0
+                    dirs.append({
+                        'name': name,
+                        'path': entry.path,
+                        'type': 'directory',
+                        'is_selected': False,  # Directories aren't selected
+                        'file_count': file_count,
+                        'dir_count': dir_count
+                    })
+                else:
+                    files.append({
+                        'name': name,
+                        'path': entry.path,
+                        'type': 'file',
+                        'is_selected': entry.path in current_additional
+                    })
+        
+        dirs.sort(key=lambda x: (x['name'].lower(), x['name']))
+        files.sort(key=lambda x: (x['name'].lower(), x['name']))
+        return dirs, files
+    
     def _lazy_load_directory(self, item):
         """Lazy load directory contents when expanded"""
         print(f"DEBUG: _lazy_load_directory called for item: {item}")
@@ -957,7 +964,7 @@ class AdditionalFilesEditor(ttk.Frame):
         """Load local subdirectory contents"""
         print(f"DEBUG: _load_local_subdirectory called for {dir_path}")
         
-        blacklist_items = self.config.get("blacklist", {}).get(self.base_dir, [])
+        is_blacklisted = blacklist_matcher(self.config.get("blacklist", {}).get(self.base_dir, []))
         
         # Get current additional files for marking
         current_additional = set(self.config.get("project_output_files", []))
@@ -966,52 +973,10 @@ class AdditionalFilesEditor(ttk.Frame):
                 current_additional.update(d.get("output_files", []))
         
         try:
-            entries = sorted(os.listdir(dir_path))
-            items = []
-            
-            for entry in entries:
-                full_path = os.path.join(dir_path, entry)
-                rel_path = os.path.relpath(full_path, self.base_dir)
-                
-                # Skip blacklisted items
-                if is_rel_path_blacklisted(rel_path, blacklist_items):
-                    continue
-                
-                try:
-                    if os.path.isdir(full_path):
-                        # Count contents
-                        try:
-                            contents = os.listdir(full_path)
-                            file_count = sum(1 for f in contents if os.path.isfile(os.path.join(full_path, f)))
-                            dir_count = len(contents) - file_count
-                        except:
-                            file_count = 0
-                            dir_count = 0
-                            
-                        items.append({
-                            'name': entry,
-                            'path': full_path,
-                            'type': 'directory',
-                            'is_selected': False,
-                            'file_count': file_count,
-                            'dir_count': dir_count
-                        })
-                    else:
-                        items.append({
-                            'name': entry,
-                            'path': full_path,
-                            'type': 'file',
-                            'is_selected': full_path in current_additional
-                        })
-                except:
-                    continue
-            
-            # Sort items
-            dirs = [i for i in items if i['type'] == 'directory']
-            files = [i for i in items if i['type'] == 'file']
-            
-            dirs.sort(key=lambda x: x['name'].lower())
-            files.sort(key=lambda x: x['name'].lower())
+            rel_dir = os.path.relpath(dir_path, self.base_dir)
+            rel_prefix = "" if rel_dir == "." else rel_dir + os.sep
+            dirs, files = self._scan_local_entries(dir_path, rel_prefix, is_blacklisted,
+                                                   current_additional)
             
             all_items = dirs + files
             
@@ -1058,7 +1023,7 @@ class AdditionalFilesEditor(ttk.Frame):
     def _load_remote_subdirectory_threaded(self, parent_item, dir_path, loading_id):
         """Load remote subdirectory contents in thread"""
         try:
-            blacklist_items = self.config.get("blacklist", {}).get(self.base_dir, [])
+            is_blacklisted = blacklist_matcher(self.config.get("blacklist", {}).get(self.base_dir, []))
             
             # Get current additional files for marking
             current_additional = set(self.config.get("project_output_files", []))
@@ -1075,6 +1040,8 @@ class AdditionalFilesEditor(ttk.Frame):
             result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
             
             items = []
+            rel_dir = os.path.relpath(dir_path, self.base_dir)
+            rel_prefix = "" if rel_dir == "." else rel_dir + os.sep
             
             if result.returncode == 0 and result.stdout.strip():
                 # Parse ls -la output
@@ -1093,10 +1060,10 @@ class AdditionalFilesEditor(ttk.Frame):
                             continue
                         
                         full_path = os.path.join(dir_path, fname)
-                        rel_path = os.path.relpath(full_path, self.base_dir)
+                        rel_path = rel_prefix + fname
                         
                         # Skip blacklisted items
-                        if is_rel_path_blacklisted(rel_path, blacklist_items):
+                        if is_blacklisted(rel_path):
                             continue
                         
                         is_dir = perms.startswith('d')
@@ -1190,11 +1157,12 @@ class AdditionalFilesEditor(ttk.Frame):
     def _update_selected_listbox(self):
         """Update the selected files listbox"""
         self.selected_listbox.delete(0, tk.END)
+        relpath = relpath_from(self.base_dir)
         
         for filepath in sorted(self.available_tree_widget.selected_files):
             # Show relative path if possible
             try:
-                rel_path = os.path.relpath(filepath, self.base_dir)
+                rel_path = relpath(filepath)
                 self.selected_listbox.insert(tk.END, rel_path)
             except:
                 self.selected_listbox.insert(tk.END, filepath)
@@ -1310,8 +1278,7 @@ class AdditionalFilesEditor(ttk.Frame):
             
             # Save config
             from setup.constants import CONFIG_FILE
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(self.config, f, indent=4)
+            dump_file(self.config, CONFIG_FILE, indent=True)
             
             messagebox.showinfo("Success", "Additional files configuration saved!")
             
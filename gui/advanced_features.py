@@ -11,6 +11,7 @@ from tkinter import ttk, messagebox
 from datetime import datetime
 import difflib
 from collections import defaultdict
+from setup.blacklist_utils import blacklist_matcher
 
 class FilePreviewWidget(ttk.Frame):
     """
@@ -77,8 +78,9 @@ class FilePreviewWidget(ttk.Frame):
                     content = f.read()
             
             # Limit preview size
-            lines = content.splitlines()[:100]
-            if len(content.splitlines()) > 100:
+            lines = content.splitlines()
+            if len(lines) > 100:
+                del lines[100:]
                 lines.append("... (truncated)")
             
             # Get file size
@@ -362,16 +364,21 @@ class ProjectAnalyzer:
         self.stats.clear()
         self.file_types.clear()
         
+        blacklist = self.blacklist.get(self.base_dir, []) if isinstance(self.blacklist, dict) else []
+        is_blacklisted = blacklist_matcher(blacklist)
         for root, dirs, files in os.walk(self.base_dir):
-            # Skip blacklisted directories
-            dirs[:] = [d for d in dirs if not self._is_blacklisted(os.path.join(root, d))]
+            # Skip blacklisted directories: pruned here, the walk never
+            # lists them (relpath once per directory, not per entry)
+            rel_root = os.path.relpath(root, self.base_dir)
+            rel_prefix = "" if rel_root == "." else rel_root + os.sep
+            dirs[:] = [d for d in dirs if not is_blacklisted(rel_prefix + d)]
             
             self.stats['directories'] += 1
             
             for file in files:
-                filepath = os.path.join(root, file)
-                if self._is_blacklisted(filepath):
+                if is_blacklisted(rel_prefix + file):
                     continue
+                filepath = os.path.join(root, file)
                 
                 self.stats['files'] += 1
                 
@@ -401,11 +408,6 @@ class ProjectAnalyzer:
         
         return self.get_report()
     
-    def _is_blacklisted(self, path):
-        """Check if path is blacklisted"""
-        # Implementation would check against blacklist
-        return False
-    
     def get_report(self):
         """Generate analysis report"""
         report = []
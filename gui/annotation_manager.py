@@ -20,7 +20,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
     from annotate_files import (
         comment_symbols, file_has_header, build_header,
-        remote_cat, remote_write, _header_regex
+        remote_cat, remote_write, _header_regex, ssh_argv
     )
 except ImportError:
     # Fallback imports if annotate_files is not in expected location
@@ -28,10 +28,10 @@ except ImportError:
     sys.path.insert(0, parent_dir)
     from annotate_files import (
         comment_symbols, file_has_header, build_header,
-        remote_cat, remote_write, _header_regex
+        remote_cat, remote_write, _header_regex, ssh_argv
     )
 
-from setup.content_setup import is_rel_path_blacklisted
+from setup.blacklist_utils import blacklist_matcher, relpath_from
 from setup.constants import CONFIG_FILE
 
 
@@ -43,6 +43,7 @@ class AnnotationManager:
         self.project_root = Path(config.get("project_root", os.getcwd()))
         self.blacklist = config.get("blacklist", {})
         self.ssh_command = config.get("ssh_command", "")
+        self.ssh_argv = ssh_argv(self.ssh_command)
         
         # Cache for performance
         self.file_status_cache = {}
@@ -59,15 +60,15 @@ class AnnotationManager:
         
         if is_remote:
             files = self._scan_remote_directory(directory)
+            # Bind the compiled check once; the loop then costs one call per file
+            is_blacklisted = blacklist_matcher(self.blacklist.get(directory, []))
+            relpath = relpath_from(directory)
+            files = [fp for fp in files if not is_blacklisted(relpath(fp))]
         else:
+            # Already filtered during the walk
             files = self._scan_local_directory(directory)
         
         for filepath in files:
-            # Check blacklist
-            rel_path = os.path.relpath(filepath, directory)
-            if is_rel_path_blacklisted(rel_path, self.blacklist.get(directory, [])):
-                continue
-            
             # Check annotation status
             status = self._check_file_annotation(filepath, base_path, is_remote)
             results[filepath] = status
@@ -75,18 +76,34 @@ class AnnotationManager:
         return results
     
     def _scan_local_directory(self, directory: str) -> List[str]:
-        """Recursively scan local directory for files"""
+        """Recursively scan local directory for non-blacklisted files"""
         files = []
-        for root, dirs, filenames in os.walk(directory):
-            # Filter out blacklisted directories
-            dirs[:] = [d for d in dirs if not is_rel_path_blacklisted(
-                os.path.relpath(os.path.join(root, d), directory),
-                self.blacklist.get(directory, [])
-            )]
-            
-            for filename in filenames:
-                filepath = os.path.join(root, filename)
-                files.append(filepath)
+        is_blacklisted = blacklist_matcher(self.blacklist.get(directory, []))
+        # Explicit os.scandir stack rather than os.walk: entry types and
+        # paths come with the listing, so there is no stat or os.path.join
+        # per entry. As with os.walk, symlinked directories are not entered.
+        stack = [(directory, "")]
+        while stack:
+            root, rel_prefix = stack.pop()
+            try:
+                it = os.scandir(root)
+            except OSError:
+                continue
+            subdirs = []
+            with it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    rel = rel_prefix + entry.name
+                    if is_blacklisted(rel):
+                        continue    # blacklisted directories are never listed
+                    if not is_dir:
+                        files.append(entry.path)
+                    elif not entry.is_symlink():
+                        subdirs.append((entry.path, rel + os.sep))
+            stack.extend(reversed(subdirs))
         
         return files
     
@@ -119,7 +136,7 @@ class AnnotationManager:
         # Read first few lines
         first_lines = []
         if is_remote:
-            content = remote_cat(self.ssh_command, filepath, 4)
+            content = remote_cat(self.ssh_argv, filepath, 4)
             first_lines = content.split('\n') if content else []
         else:
             try:
@@ -302,7 +319,7 @@ class AnnotationManager:
         """Add annotation to remote file"""
         try:
             # Read file
-            content = remote_cat(self.ssh_command, filepath)
+            content = remote_cat(self.ssh_argv, filepath)
             if content is None:
                 return False
             
@@ -318,7 +335,7 @@ class AnnotationManager:
             lines.insert(insert_idx, header_line)
             
             # Write back
-            return remote_write(self.ssh_command, filepath, ''.join(lines))
+            return remote_write(self.ssh_argv, filepath, ''.join(lines))
         except Exception as e:
             print(f"Error annotating remote {filepath}: {e}")
             return False
@@ -734,10 +751,11 @@ class AnnotationManagerTab(ttk.Frame):
         self.progress_frame.grid_remove()
         
         # Update statistics
+        annotated = sum(1 for r in results.values() if r["annotated"])
         stats = {
             "total": len(results),
-            "annotated": sum(1 for r in results.values() if r["annotated"]),
-            "missing": sum(1 for r in results.values() if not r["annotated"])
+            "annotated": annotated,
+            "missing": len(results) - annotated
         }
         stats["percentage"] = (stats["annotated"] / stats["total"] * 100) if stats["total"] > 0 else 0
         
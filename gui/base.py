@@ -3,11 +3,12 @@
 Base classes and common functionality for the improved GUI
 """
 import os
-import json
 import tkinter as tk
 from tkinter import ttk, font as tkfont
 from functools import lru_cache
 
+from setup.json_utils import load_file, dump_file
+
 STATE_SELECTION_FILE = "selection_state.json"
 CACHE_FILE = "remote_cache.json"
 
@@ -22,15 +23,13 @@ class RemoteCache:
     def load_cache(self):
         if os.path.exists(CACHE_FILE):
             try:
-                with open(CACHE_FILE, "r") as f:
-                    self.cache = json.load(f)
+                self.cache = load_file(CACHE_FILE)
             except:
                 self.cache = {}
     
     def save_cache(self):
         try:
-            with open(CACHE_FILE, "w") as f:
-                json.dump(self.cache, f)
+            dump_file(self.cache, CACHE_FILE, atomic=True)
         except:
             pass
     
@@ -47,6 +46,11 @@ remote_cache = RemoteCache()
 # Enhanced file tree data structure
 # ---------------------------------------------------------------------------
 class FileTreeNode:
+    # One node per file in the project: slots keep each to a fixed set of
+    # fields instead of a per-instance __dict__
+    __slots__ = ("name", "path", "is_dir", "parent", "children", "selected",
+                 "expanded", "visible", "matches_filter")
+    
     def __init__(self, name, path, is_dir=False, parent=None):
         self.name = name
         self.path = path
@@ -108,16 +112,14 @@ class FileTreeNode:
 def load_selection_state():
     if os.path.exists(STATE_SELECTION_FILE):
         try:
-            with open(STATE_SELECTION_FILE, "r") as f:
-                return json.load(f)
+            return load_file(STATE_SELECTION_FILE)
         except Exception as e:
             print(f"Error loading selection state: {e}")
     return {}
 
 def save_selection_state(state):
     try:
-        with open(STATE_SELECTION_FILE, "w") as f:
-            json.dump(state, f)
+        dump_file(state, STATE_SELECTION_FILE, atomic=True)
     except Exception as e:
         print(f"Error saving selection state: {e}")
 
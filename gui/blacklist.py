@@ -3,10 +3,10 @@
 Blacklist editor with tree view for managing excluded files/directories
 """
 import os
-import json
 import tkinter as tk
 from tkinter import ttk, messagebox
-from setup.content_setup import is_rel_path_blacklisted
+from setup.blacklist_utils import blacklist_matcher
+from setup.json_utils import dump_file
 from .base import setup_tree_tags
 
 class BlacklistEditor(ttk.Frame):
@@ -86,24 +86,34 @@ class BlacklistEditor(ttk.Frame):
         self.blacklist_item_to_path[root_id] = base_dir
         
         # Build tree with blacklist awareness
+        bl_match = blacklist_matcher(blacklist_items)
+        
         def insert_tree_items(parent_item, parent_path, relative_parent=""):
+            # scandir: entry types come with the listing, no stat per item
             try:
-                items = sorted(os.listdir(parent_path))
-            except:
+                with os.scandir(parent_path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
                 return
             
-            for item_name in items:
-                item_path = os.path.join(parent_path, item_name)
-                relative_path = os.path.join(relative_parent, item_name).strip(os.sep)
+            # Same for every entry of this directory
+            parent_blacklisted = bool(relative_parent) and bl_match(relative_parent)
+            rel_prefix = relative_parent + os.sep if relative_parent else ""
+            
+            for entry in entries:
+                item_name = entry.name
+                item_path = entry.path
+                relative_path = rel_prefix + item_name
                 
                 # Check if this item or any parent is blacklisted
-                is_blacklisted = is_rel_path_blacklisted(relative_path, blacklist_items)
-                parent_blacklisted = any(
-                    is_rel_path_blacklisted(relative_parent, blacklist_items)
-                    for relative_parent in [relative_parent] if relative_parent
-                )
+                is_blacklisted = bl_match(relative_path)
+                
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
                 
-                if os.path.isdir(item_path):
+                if is_dir:
                     # Show directory with blacklist indicator
                     prefix = "[B] " if is_blacklisted else ""
                     tags = ["directory"]
@@ -202,8 +212,7 @@ class BlacklistEditor(ttk.Frame):
         # Save to config file
         try:
             from setup.constants import CONFIG_FILE
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(self.config, f, indent=4)
+            dump_file(self.config, CONFIG_FILE, indent=True)
             messagebox.showinfo("Success", "Blacklist saved successfully!")
             
             # Reload the main file selection tree
@@ -14,10 +14,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from setup.constants import CONFIG_FILE, INSTRUCTIONS_DIR
+    from setup.json_utils import dump_file
 except ImportError:
     # Fallback if constants not available
     CONFIG_FILE = "gpt_helper_config.json"
     INSTRUCTIONS_DIR = "project_instructions"
+    
+    def dump_file(obj, path, indent=False):
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=4 if indent else None)
 
 class ConfigFilesEditor(ttk.Frame):
     def __init__(self, parent, config, on_config_update=None, **kwargs):
@@ -447,8 +452,7 @@ class ConfigFilesEditor(ttk.Frame):
                 saved_count += 1
             
             # Save config file
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(self.config, f, indent=4)
+            dump_file(self.config, CONFIG_FILE, indent=True)
             
             # Notify parent of config update
             if self.on_config_update:
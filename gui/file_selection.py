@@ -17,7 +17,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from setup.content_setup import is_rel_path_blacklisted
+    from setup.blacklist_utils import is_rel_path_blacklisted, blacklist_matcher
     from setup.remote_utils import get_remote_tree, parse_remote_tree
 except ImportError:
     # Fallback implementation
@@ -28,8 +28,20 @@ except ImportError:
                 return True
         return False
 
+    def blacklist_matcher(blacklist):
+        return lambda rel_path: is_rel_path_blacklisted(rel_path, blacklist)
+
+from setup.tree_utils import LazyTreeChildren
 from .base import FileTreeNode, remote_cache, setup_tree_tags
 
+# Extension -> styling tag; one dict lookup per file while the tree loads
+_FILE_TYPES = {
+    **dict.fromkeys(('.py', '.pyw'), "python"),
+    **dict.fromkeys(('.js', '.jsx', '.ts', '.tsx'), "javascript"),
+    **dict.fromkeys(('.json', '.yaml', '.yml', '.toml', '.ini', '.cfg'), "config"),
+    **dict.fromkeys(('.md', '.txt', '.rst', '.doc', '.docx'), "document"),
+}
+
 class CheckboxTreeview(ttk.Treeview):
     """Custom Treeview with checkbox support"""
     
@@ -93,6 +105,8 @@ class EnhancedTreeWidget(ttk.Frame):
         self.persistent_files = persistent_files or []
         self.root_node = None
         self.item_to_node = {}
+        self._pending_dirs = {}  # item -> node whose child rows are not inserted yet
+        self._loaded_dirs = set()  # paths of directories that have had their rows inserted
         self.loading_queue = queue.Queue()
         self.selection_history = []  # For undo/redo
         self.file_patterns = self._load_file_patterns()
@@ -221,7 +235,8 @@ class EnhancedTreeWidget(ttk.Frame):
         
         # Bind events
         self.tree.bind("<Button-1>", self._on_click)
-        self.tree.bind("<<TreeviewOpen>>", self._on_tree_open)
+        # Directories not shown yet are filled in when first opened
+        self._lazy_dirs = LazyTreeChildren(self.tree, self._fill_children, self._pending_dirs)
         self.tree.bind("<<TreeviewClose>>", self._on_tree_close)
         self.tree.bind("<Button-3>", self._show_context_menu)  # Right-click
         self.tree.bind("<space>", self._on_space_key)
@@ -310,17 +325,7 @@ class EnhancedTreeWidget(ttk.Frame):
     def _determine_file_type(self, filename):
         """Determine file type for styling"""
         ext = os.path.splitext(filename)[1].lower()
-        
-        if ext in ['.py', '.pyw']:
-            return "python"
-        elif ext in ['.js', '.jsx', '.ts', '.tsx']:
-            return "javascript"
-        elif ext in ['.json', '.yaml', '.yml', '.toml', '.ini', '.cfg']:
-            return "config"
-        elif ext in ['.md', '.txt', '.rst', '.doc', '.docx']:
-            return "document"
-        else:
-            return "file"
+        return _FILE_TYPES.get(ext, "file")
     
     def _load_tree_async(self):
         """Load the tree structure in a background thread"""
@@ -343,30 +348,26 @@ class EnhancedTreeWidget(ttk.Frame):
                 is_dir=True
             )
             
-            # Sort items by path for proper tree construction
-            items.sort(key=lambda x: x["path"])
+            # Sort items by path for proper tree construction (paths are
+            # unique, so plain tuple order is path order)
+            items.sort()
             
             # Build node hierarchy
             path_to_node = {self.base_dir: self.root_node}
+            persistent = self.persistent_files
             
-            for item in items:
-                parent_path = os.path.dirname(item["path"])
-                parent_node = path_to_node.get(parent_path)
+            for path, name, is_dir in items:
+                parent_node = path_to_node.get(os.path.dirname(path))
                 
                 if parent_node:
-                    node = FileTreeNode(
-                        item["name"],
-                        item["path"],
-                        is_dir=(item["type"] == "directory"),
-                        parent=parent_node
-                    )
+                    node = FileTreeNode(name, path, is_dir=is_dir, parent=parent_node)
                     
                     # Restore selection state
-                    if item["path"] in self.persistent_files:
+                    if path in persistent:
                         node.selected = True
                     
                     parent_node.children.append(node)
-                    path_to_node[item["path"]] = node
+                    path_to_node[path] = node
             
             self.loading_queue.put(("done", None))
             
@@ -374,43 +375,58 @@ class EnhancedTreeWidget(ttk.Frame):
             self.loading_queue.put(("error", str(e)))
     
     def _build_local_items(self):
-        """Build items list for local directory"""
+        """
+        Build the (path, name, is_dir) items for a local directory. Plain
+        tuples, not dicts: they are only unpacked once into FileTreeNodes,
+        and a tuple is a single small allocation with no per-item key table.
+        """
         items = []
         blacklist_list = self.blacklist.get(self.base_dir, []) if isinstance(self.blacklist, dict) else []
         
-        for root, dirs, files in os.walk(self.base_dir, topdown=True):
-            # Filter blacklisted directories
-            dirs[:] = [d for d in dirs if not self._is_blacklisted(os.path.join(root, d), blacklist_list)]
-            
-            # Add directories
-            for d in dirs:
-                path = os.path.join(root, d)
-                if not self._is_blacklisted(path, blacklist_list):
-                    items.append({
-                        "type": "directory",
-                        "name": d,
-                        "path": path
-                    })
+        is_blacklisted = blacklist_matcher(blacklist_list)
+        
+        # Explicit os.scandir stack instead of os.walk: entry types come with
+        # the listing and the relative path is carried along, so there is no
+        # stat, join or relpath per entry. Order does not matter here, the
+        # caller sorts by path. Like os.walk, symlinked directories are
+        # listed but not descended into.
+        stack = [(self.base_dir, "")]
+        while stack:
+            dir_path, rel_prefix = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
             
-            # Add files
-            for f in sorted(files):
-                path = os.path.join(root, f)
-                if not self._is_blacklisted(path, blacklist_list):
-                    items.append({
-                        "type": "file",
-                        "name": f,
-                        "path": path
-                    })
+            for entry in entries:
+                rel = rel_prefix + entry.name
+                if is_blacklisted(rel):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                items.append((entry.path, entry.name, is_dir))
+                if is_dir and not entry.is_symlink():
+                    stack.append((entry.path, rel + os.sep))
         
         return items
     
     def _build_remote_items(self):
-        """Build items list for remote directory with caching"""
+        """
+        Build the (path, name, is_dir) items for a remote directory, with
+        caching. They are cached as [path, name, is_dir] arrays; caches
+        written as {"type", "name", "path"} objects are still read.
+        """
         cache_key = f"{self.ssh_cmd}:{self.base_dir}"
         cached_items = remote_cache.get(cache_key)
         
         if cached_items and isinstance(cached_items, list):
-            return cached_items
+            if isinstance(cached_items[0], dict):
+                return [(it["path"], it["name"], it["type"] == "directory")
+                        for it in cached_items]
+            return [tuple(it) for it in cached_items]
         
         # Fetch from remote
         try:
@@ -425,12 +441,7 @@ class EnhancedTreeWidget(ttk.Frame):
         def recurse(subtree, current_path):
             for key in sorted(subtree.keys()):
                 item_path = os.path.join(current_path, key)
-                item_type = "directory" if subtree[key] else "file"
-                items.append({
-                    "type": item_type,
-                    "name": key,
-                    "path": item_path
-                })
+                items.append((item_path, key, bool(subtree[key])))
                 if subtree[key]:
                     recurse(subtree[key], item_path)
         
@@ -441,11 +452,6 @@ class EnhancedTreeWidget(ttk.Frame):
         
         return items
     
-    def _is_blacklisted(self, path, blacklist_list):
-        """Check if path is blacklisted"""
-        rel = os.path.relpath(path, self.base_dir).strip(os.sep)
-        return is_rel_path_blacklisted(rel, blacklist_list)
-    
     def _process_loading_queue(self):
         """Process loading queue messages (runs in main thread)"""
         try:
@@ -467,34 +473,39 @@ class EnhancedTreeWidget(ttk.Frame):
         # Clear existing items
         self.tree.delete(*self.tree.get_children())
         self.item_to_node.clear()
+        self._pending_dirs.clear()
         
         if not self.root_node:
             return
         
         # Add root with special formatting
-        root_item = self._add_node_to_tree_enhanced("", self.root_node)
+        root_item = self._add_node_to_tree_enhanced("", self.root_node,
+                                                    self._dirs_with_selected_files())
         self.tree.item(root_item, open=True)
         
         # Update status
         self._update_status()
     
-    def _add_node_to_tree_enhanced(self, parent_item, node):
-        """Add a node with enhanced formatting and information"""
+    def _add_node_to_tree_enhanced(self, parent_item, node, has_sel):
+        """
+        Add a node with enhanced formatting and information. *has_sel* is
+        the _dirs_with_selected_files() set for the whole tree.
+        """
         # Icon based on type and state
         if node.is_dir:
             icon = "📁"
             tags = ["directory"]
             
             # Check if directory has some but not all children selected
-            total_children = sum(1 for child in node.children if not child.is_dir)
-            selected_children = sum(1 for child in node.children if not child.is_dir and child.selected)
-            
-            # Also check subdirectories
+            # (a subdirectory counts as selected if any file under it is)
+            total_children = len(node.children)
+            selected_children = 0
             for child in node.children:
                 if child.is_dir:
-                    if self._has_selected_files(child):
+                    if id(child) in has_sel:
                         selected_children += 1
-                    total_children += 1
+                elif child.selected:
+                    selected_children += 1
             
             if node.selected:
                 tags.append("directory_selected")
@@ -536,7 +547,7 @@ class EnhancedTreeWidget(ttk.Frame):
             if node.selected:
                 checkbox_state = "checked"
                 checkbox_image = self.tree.checked_image
-            elif self._has_selected_files(node):
+            elif id(node) in has_sel:
                 checkbox_state = "tristate"
                 checkbox_image = self.tree.tristate_image
             else:
@@ -554,15 +565,33 @@ class EnhancedTreeWidget(ttk.Frame):
         # Store checkbox state
         self.tree.checkbox_states[item] = checkbox_state
         
-        # Add children
+        # Add children. Rows are only created for the root and for
+        # directories opened before (so a refresh keeps what was shown);
+        # the rest get a placeholder row, which keeps the expand arrow, and
+        # are filled in when opened (see LazyTreeChildren). Rows, and their
+        # stat calls, are then only paid for the parts of the tree the user
+        # looks at.
         if node.is_dir:
-            children = sorted(node.children, key=lambda n: (not n.is_dir, n.name.lower()))
-            for child in children:
-                if child.visible or self.show_hidden_var.get():
-                    self._add_node_to_tree_enhanced(item, child)
+            show_hidden = self.show_hidden_var.get()
+            if not parent_item or node.path in self._loaded_dirs:
+                self._insert_children(item, node, has_sel)
+            elif any(child.visible or show_hidden for child in node.children):
+                self._lazy_dirs.add_placeholder(item, node)
         
         return item
     
+    def _insert_children(self, item, node, has_sel):
+        """Insert the rows for *node*'s children under *item*"""
+        self._loaded_dirs.add(node.path)
+        children = sorted(node.children, key=lambda n: (not n.is_dir, n.name.lower()))
+        for child in children:
+            if child.visible or self.show_hidden_var.get():
+                self._add_node_to_tree_enhanced(item, child, has_sel)
+    
+    def _fill_children(self, item, node):
+        """Insert the rows of a directory left pending until it was opened"""
+        self._insert_children(item, node, self._dirs_with_selected_files(node))
+    
     def _show_context_menu(self, event):
         """Show context menu on right-click"""
         item = self.tree.identify("item", event.x, event.y)
@@ -872,6 +901,32 @@ class EnhancedTreeWidget(ttk.Frame):
             count += self._count_visible_files(child)
         return count
     
+    def _dirs_with_selected_files(self, root=None):
+        """
+        ids of the directory nodes with a selected file somewhere below
+        them, found in one post-order pass over the tree (or the subtree at
+        *root*). Bulk redraws use this instead of a _has_selected_files walk
+        per directory row, which re-scans every subtree once per ancestor.
+        """
+        found = set()
+        
+        def visit(node):
+            hit = False
+            for child in node.children:
+                if child.is_dir:
+                    if visit(child):
+                        hit = True
+                elif child.selected:
+                    hit = True
+            if hit:
+                found.add(id(node))
+            return hit
+        
+        root = root or self.root_node
+        if root:
+            visit(root)
+        return found
+    
     def _has_selected_files(self, node):
         """Check if a node or any of its children has selected files"""
         if not node.is_dir and node.selected:
@@ -958,11 +1013,6 @@ class EnhancedTreeWidget(ttk.Frame):
         self._update_checkbox_displays()
         self._update_status()
     
-    def _on_tree_open(self, event):
-        """Handle tree item expansion"""
-        # Default behavior is fine - just expand/collapse
-        pass
-    
     def _on_tree_close(self, event):
         """Handle tree item collapse"""
         # Default behavior is fine - just expand/collapse
@@ -970,13 +1020,14 @@ class EnhancedTreeWidget(ttk.Frame):
 
     def _update_checkbox_displays(self):
         """Update checkbox displays for all items based on their state"""
+        has_sel = self._dirs_with_selected_files()
         for item, node in self.item_to_node.items():
             if node.is_dir:
                 # For directories, check if all/some/none children are selected
                 if node.selected:
                     state = "checked"
                     image = self.tree.checked_image
-                elif self._has_selected_files(node):
+                elif id(node) in has_sel:
                     state = "tristate"
                     image = self.tree.tristate_image
                 else:
@@ -997,7 +1048,7 @@ class EnhancedTreeWidget(ttk.Frame):
                 tags = [t for t in tags if t not in ("directory_selected", "directory_partial")]
                 if node.selected:
                     tags.append("directory_selected")
-                elif self._has_selected_files(node):
+                elif id(node) in has_sel:
                     tags.append("directory_partial")
             else:
                 # Remove old selection tags
@@ -1009,23 +1060,28 @@ class EnhancedTreeWidget(ttk.Frame):
     def _update_parent_directory_states(self):
         """Update directory selection states based on their children"""
         def update_directory_state(node):
+            """Returns whether *node* has a selected file below it"""
             if not node.is_dir:
-                return
+                return False
             
             # Count selected children
             total_children = 0
             selected_children = 0
+            has_files = False
             
             for child in node.children:
                 if not child.is_dir:
                     total_children += 1
                     if child.selected:
                         selected_children += 1
+                        has_files = True
                 else:
-                    # Recursively update child directories first
-                    update_directory_state(child)
+                    # Recursively update child directories first; the answer
+                    # for the subtree comes back with it, no second walk
+                    child_has_files = update_directory_state(child)
+                    has_files = has_files or child_has_files
                     # Count this directory as selected if it has any selected files
-                    if child.selected or self._has_selected_files(child):
+                    if child.selected or child_has_files:
                         selected_children += 1
                     total_children += 1
             
@@ -1039,6 +1095,7 @@ class EnhancedTreeWidget(ttk.Frame):
             else:
                 # Some or no children selected
                 node.selected = False
+            return has_files
         
         # Start from root
         if self.root_node:
@@ -1092,6 +1149,7 @@ class EnhancedTreeWidget(ttk.Frame):
     def _expand_all(self):
         """Expand all directories"""
         def expand(item):
+            self._lazy_dirs.load(item)
             self.tree.item(item, open=True)
             for child in self.tree.get_children(item):
                 expand(child)
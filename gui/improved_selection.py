@@ -6,6 +6,7 @@ import os
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import List, Set
+from setup.blacklist_utils import relpath_from
 
 class ImprovedFileSelectionGUI:
     """Enhanced file selection with bulk operations and better UX"""
@@ -310,10 +311,11 @@ class ImprovedFileSelectionGUI:
     def _update_selected_list(self):
         """Update the selected files listbox"""
         self.selected_listbox.delete(0, tk.END)
+        relpath = relpath_from(self.base_dir)
         for filepath in sorted(self.selected_files):
             # Show relative path for better readability
             try:
-                rel_path = os.path.relpath(filepath, self.base_dir)
+                rel_path = relpath(filepath)
                 self.selected_listbox.insert(tk.END, rel_path)
             except:
                 self.selected_listbox.insert(tk.END, filepath)
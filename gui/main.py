@@ -4,7 +4,6 @@ Main GUI window that integrates all components
 Merged version combining classic and enhanced functionality
 """
 import os
-import json
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
@@ -13,6 +12,7 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from setup.json_utils import load_file, dump_file
 from .base import load_selection_state, save_selection_state, remote_cache
 from .file_selection import EnhancedTreeWidget, ImprovedFileSelectionWidget
 from .blacklist import BlacklistEditor
@@ -370,8 +370,7 @@ class ImprovedFileSelectionGUI:
             
             # Save config
             from setup.constants import CONFIG_FILE
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(self.config, f, indent=4)
+            dump_file(self.config, CONFIG_FILE, indent=True)
             
             self.main_status.set("✅ All settings saved!")
             
@@ -461,8 +460,7 @@ class ImprovedFileSelectionGUI:
         }
         
         try:
-            with open("gpt_helper_state.json", "w") as f:
-                json.dump(state, f, indent=2)
+            dump_file(state, "gpt_helper_state.json", indent=True)
             self._show_notification("State saved!", 2000)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save state: {e}")
@@ -470,8 +468,7 @@ class ImprovedFileSelectionGUI:
     def _load_saved_state(self):
         """Load previously saved state"""
         try:
-            with open("gpt_helper_state.json", "r") as f:
-                state = json.load(f)
+            state = load_file("gpt_helper_state.json")
             
             # Restore window geometry
             if 'window_geometry' in state:
@@ -673,8 +670,7 @@ class ImprovedFileSelectionGUI:
         
         # Save performance stats for analysis
         try:
-            with open("gpt_helper_performance.json", "w") as f:
-                json.dump(self.performance_stats, f, indent=2)
+            dump_file(self.performance_stats, "gpt_helper_performance.json", indent=True)
         except:
             pass
         
@@ -711,8 +707,7 @@ def gui_selection(title, bg_color, base_dir, state_key, is_remote=False,
         config = {}
         if os.path.exists(CONFIG_FILE):
             try:
-                with open(CONFIG_FILE, "r") as f:
-                    config = json.load(f)
+                config = load_file(CONFIG_FILE)
             except:
                 pass
     
@@ -1,33 +1,43 @@
 # gpt_helper/dev/main.py
 import os
 import sys
-import json
 import argparse
 import tempfile
+import shutil
 import subprocess
 import concurrent.futures
-from functools import lru_cache
 import time
 from datetime import datetime
 import hashlib
 import tarfile
 import io
+import mmap
+import shlex
+import threading
 from threading import Lock
-from collections import defaultdict
+from collections import defaultdict, deque
+from itertools import islice
 from datetime import timedelta
 
-from setup.constants import CONFIG_FILE, INSTRUCTIONS_DIR
+from setup.constants import CONFIG_FILE, INSTRUCTIONS_DIR, INSTRUCTION_PATHS
 from setup import run_setup
-from steps import step1, step2_all_segments
-from editor import open_in_editor, edit_file_tk
+from setup.blacklist_utils import blacklist_matcher
+from setup.json_utils import load_file, dump_file, loads, orjson
+from setup.ssh_utils import (CONTROL_PATH, MUX_OPTS, ensure_control_dir, is_openssh,
+                              iter_tar_files, with_opts)
+from steps import step1, step2_segment_texts, abs_project_root, clear_tree_cache
+from editor import exec_in_editor, edit_file_tk
 
-# Import GUI
-try:
-    from gui import gui_selection
+# Import GUI - deferred until a mode that needs it, so --stats, --step1,
+# -e, --clear-cache etc. start without loading Tk
+def load_gui():
+    try:
+        from gui import gui_selection
+    except ImportError:
+        print("❌ Error: Could not import GUI module")
+        sys.exit(1)
     print("✅ GUI module loaded successfully")
-except ImportError:
-    print("❌ Error: Could not import GUI module")
-    sys.exit(1)
+    return gui_selection
 
 # ---------------------------------------------------------------------------
 # Remote File Optimizer (merged from remote_optimizer.py)
@@ -44,6 +54,16 @@ class RemoteFileOptimizer:
     
     def __init__(self, ssh_cmd, cache_dir=None):
         self.ssh_cmd = ssh_cmd
+        # Cache keys use the command as configured, never the per-run socket
+        self.ssh_key = ssh_cmd
+        # Split once; every remote call is ssh_argv + [remote command]
+        self._base_argv = shlex.split(ssh_cmd)
+        self.ssh_argv = list(self._base_argv)
+        self.control_path = None
+        # Set once reads ride an authenticated master: only then can they
+        # run detached from the terminal, since nothing needs to prompt
+        self.multiplexed = False
+        self.connect_failed = False
         self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "gpt_helper_cache")
         os.makedirs(self.cache_dir, exist_ok=True)
         
@@ -52,7 +72,6 @@ class RemoteFileOptimizer:
         self.cache_lock = Lock()
         
         # Configuration
-        self.batch_size = 20
         self.max_workers = 5
         self.cache_ttl = timedelta(hours=24)
         self.compression_threshold = 1024  # Compress files larger than 1KB
@@ -68,35 +87,97 @@ class RemoteFileOptimizer:
         # Connection test and optimization
         self._optimize_connection()
     
+    def _ssh_with_opts(self, *opts):
+        """Configured SSH argv with *opts* placed before the destination"""
+        return with_opts(self._base_argv, *opts)
+    
     def _optimize_connection(self):
-        """Test and optimize SSH connection settings"""
+        """Open one ControlMaster connection that every later read multiplexes over"""
+        # The master listens on the ControlPath annotate_files uses too, so
+        # either tool can reuse a connection the other opened
+        ensure_control_dir()
+        sock = CONTROL_PATH
         try:
-            # Test if ControlMaster is available
-            test_cmd = f"{self.ssh_cmd} -o ControlMaster=auto -o ControlPath=/tmp/ssh-%r@%h:%p -o ControlPersist=10m echo test"
-            result = subprocess.run(test_cmd.split(), capture_output=True, timeout=5)
-            
-            if result.returncode == 0:
-                # Use connection pooling
-                self.ssh_base = f"{self.ssh_cmd} -o ControlMaster=auto -o ControlPath=/tmp/ssh-%r@%h:%p -o ControlPersist=10m"
-            else:
-                self.ssh_base = self.ssh_cmd
-                
-            # Test compression
-            test_cmd = f"{self.ssh_base} -C echo test"
-            result = subprocess.run(test_cmd.split(), capture_output=True, timeout=5)
+            # A master already up on that path (another run, annotate_files)
+            # is reused as is; only a master started here is closed again
+            check = subprocess.run(self._ssh_with_opts("-S", sock, "-O", "check"),
+                                   stdin=subprocess.DEVNULL, capture_output=True,
+                                   timeout=5)
+            if check.returncode == 0:
+                self.ssh_argv = self._ssh_with_opts("-S", sock, "-C")
+                self.multiplexed = True
+                return
+        except Exception:
+            pass
+        try:
+            # The master is the one step that authenticates, so it runs in
+            # our session with stderr on the terminal: ssh can then ask for
+            # a password, passphrase or host key confirmation (the timeout
+            # leaves time to answer). -f backgrounds it after auth; stdout
+            # must not be a pipe or run() would wait for the master to exit.
+            master_cmd = self._ssh_with_opts(
+                "-M", "-S", sock, "-o", "ControlPersist=10m", "-C", "-fN")
+            result = subprocess.run(master_cmd,
+                                    stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL,
+                                    timeout=120)
             
             if result.returncode == 0:
-                self.ssh_cmd = f"{self.ssh_base} -C"  # Enable compression
-            else:
-                self.ssh_cmd = self.ssh_base
-                
+                self.control_path = sock
+                self.ssh_argv = self._ssh_with_opts("-S", sock, "-C")
+                self.multiplexed = True
+                return
+            if is_openssh(self._base_argv):
+                # Plain ssh exits 255 when it cannot connect or authenticate;
+                # every read would fail the same way
+                self.connect_failed = True
+                print(f"❌ SSH connection failed ({self.ssh_cmd}, exit code "
+                      f"{result.returncode}); remote files cannot be read.")
+                return
+        except subprocess.TimeoutExpired:
+            if is_openssh(self._base_argv):
+                self.connect_failed = True
+                print(f"❌ SSH connection timed out ({self.ssh_cmd}); "
+                      "remote files cannot be read.")
+                return
+        except Exception:
+            pass
+        
+        # Fallback to the original command, plus opportunistic multiplexing
+        # for a plain OpenSSH client
+        if is_openssh(self._base_argv):
+            self.ssh_argv = self._ssh_with_opts(*MUX_OPTS)
+    
+    def close(self):
+        """Shut down the ControlMaster connection, if one was opened"""
+        if not self.control_path:
+            return
+        try:
+            subprocess.run(self._ssh_with_opts("-S", self.control_path, "-O", "exit"),
+                           capture_output=True, timeout=5)
         except:
-            # Fallback to original command
             pass
+        self.control_path = None
+        self.ssh_argv = list(self._base_argv)
+    
+    def __del__(self):
+        self.close()
+    
+    def _run(self, cmd, timeout, input=None):
+        """
+        Run an ssh command and capture its raw stdout; callers decode once.
+        Multiplexed reads get their own session so a Ctrl-C reaches only us,
+        and subprocess.run then kills them instead of leaving ssh on the
+        terminal. Without a master each read may have to authenticate, so
+        it stays on the terminal where ssh can prompt.
+        """
+        return subprocess.run(cmd, input=input, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              start_new_session=self.multiplexed, timeout=timeout)
     
     def _get_cache_key(self, filepath):
         """Generate cache key for a file"""
-        return hashlib.md5(f"{self.ssh_cmd}:{filepath}".encode()).hexdigest()
+        return hashlib.md5(f"{self.ssh_key}:{filepath}".encode()).hexdigest()
     
     def _get_disk_cache_path(self, cache_key):
         """Get disk cache file path"""
@@ -130,8 +211,7 @@ class RemoteFileOptimizer:
             }
             
             try:
-                with open(cache_path, 'w', encoding='utf-8') as f:
-                    json.dump(cache_data, f)
+                dump_file(cache_data, cache_path)
             except:
                 pass
     
@@ -146,8 +226,7 @@ class RemoteFileOptimizer:
         cache_path = self._get_disk_cache_path(cache_key)
         if self._is_cache_valid(cache_path):
             try:
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
+                cache_data = load_file(cache_path)
                     
                 # Populate memory cache
                 self.memory_cache[cache_key] = cache_data
@@ -172,11 +251,11 @@ class RemoteFileOptimizer:
         start_time = time.time()
         try:
             # Get file info first
-            stat_cmd = f"{self.ssh_cmd} stat -c '%s %Y' {filepath} 2>/dev/null"
-            stat_result = subprocess.run(stat_cmd, shell=True, capture_output=True, text=True, timeout=10)
+            stat_cmd = self.ssh_argv + [f"stat -c '%s %Y' {shlex.quote(filepath)} 2>/dev/null"]
+            stat_result = self._run(stat_cmd, timeout=10)
             
             if stat_result.returncode == 0:
-                size, mtime = stat_result.stdout.strip().split()
+                size, mtime = stat_result.stdout.decode().split()
                 size = int(size)
                 
                 # Use compression for larger files
@@ -202,15 +281,15 @@ class RemoteFileOptimizer:
     
     def _read_simple(self, filepath):
         """Simple file read"""
-        cmd = f"{self.ssh_cmd} cat {filepath}"
-        proc = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
-        return proc.stdout if proc.returncode == 0 else ""
+        cmd = self.ssh_argv + ["cat", shlex.quote(filepath)]
+        proc = self._run(cmd, timeout=30)
+        return proc.stdout.decode('utf-8', errors='replace') if proc.returncode == 0 else ""
     
     def _read_compressed(self, filepath):
         """Read file with compression"""
         # Use tar with gzip compression for transfer
-        cmd = f"{self.ssh_cmd} 'tar czf - -C / {filepath.lstrip('/')}'"
-        proc = subprocess.run(cmd, shell=True, capture_output=True, timeout=30)
+        cmd = self.ssh_argv + ["tar", "czf", "-", "-C", "/", shlex.quote(filepath.lstrip('/'))]
+        proc = self._run(cmd, timeout=30)
         
         if proc.returncode == 0:
             try:
@@ -228,6 +307,9 @@ class RemoteFileOptimizer:
     
     def read_files_batch(self, filepaths):
         """Read multiple files with intelligent batching"""
+        if self.connect_failed:
+            print(f"❌ Skipping {len(filepaths)} remote file(s): no SSH connection")
+            return {}
         results = {}
         uncached_files = []
         
@@ -240,68 +322,104 @@ class RemoteFileOptimizer:
             else:
                 uncached_files.append(filepath)
         
+        # The disk cache outlives the process, so validate every hit against
+        # the remote mtime - one stat round-trip for the whole batch.
+        if results:
+            mtimes = self._remote_mtimes(list(results))
+            if mtimes is not None:
+                for filepath in list(results):
+                    entry = self.memory_cache.get(self._get_cache_key(filepath), {})
+                    cached_mtime = entry.get('metadata', {}).get('mtime')
+                    if cached_mtime is None or mtimes.get(filepath) != cached_mtime:
+                        del results[filepath]
+                        uncached_files.append(filepath)
+                        self.stats['cache_hits'] -= 1
+                        self.stats['cache_misses'] += 1
+        
         if not uncached_files:
             return results
         
-        # Batch read uncached files
-        if len(uncached_files) <= self.batch_size:
-            # Small batch - read with tar
-            batch_results = self._read_batch_tar(uncached_files)
-            results.update(batch_results)
-        else:
-            # Large batch - parallel reads
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_file = {
-                    executor.submit(self.read_file, fp): fp 
-                    for fp in uncached_files
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_file):
-                    filepath = future_to_file[future]
-                    try:
-                        content = future.result()
-                        results[filepath] = content
-                    except:
-                        results[filepath] = ""
+        # One tar stream for every uncached file
+        results.update(self._read_batch_tar(uncached_files))
+        return results
+    
+    def _remote_mtimes(self, filepaths):
+        """
+        Return {path: mtime} for *filepaths* via a single remote stat.
+        Missing files are absent from the result; None means the stat
+        itself could not be run, in which case cached entries are trusted.
+        """
+        cmd = self.ssh_argv + ["xargs -0 stat -c '%Y %n' -- 2>/dev/null"]
+        try:
+            proc = self._run(cmd, timeout=30, input="\0".join(filepaths).encode())
+        except Exception:
+            return None
+        if not proc.stdout and proc.returncode not in (0, 123):
+            return None
+        
+        mtimes = {}
+        for line in proc.stdout.decode('utf-8', errors='replace').splitlines():
+            mtime, _, path = line.partition(" ")
+            if path:
+                mtimes[path] = mtime
+        return mtimes
+    
+    def _read_parallel(self, filepaths):
+        """Per-file fallback used when the tar stream cannot be used"""
+        results = {}
+        if len(filepaths) == 1:
+            # Not worth a thread pool
+            results[filepaths[0]] = self.read_file(filepaths[0])
+            return results
         
+        workers = min(self.max_workers, len(filepaths))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_file = {
+                executor.submit(self.read_file, fp): fp 
+                for fp in filepaths
+            }
+            
+            for future in concurrent.futures.as_completed(future_to_file):
+                filepath = future_to_file[future]
+                try:
+                    results[filepath] = future.result()
+                except:
+                    results[filepath] = ""
         return results
     
     def _read_batch_tar(self, filepaths):
-        """Read multiple files in one tar transfer"""
+        """
+        Read multiple files in one tar transfer (see iter_tar_files), caching
+        each member as it arrives.
+        """
         results = {}
-        
-        # Create file list for tar
-        file_list = " ".join(f"'{fp.lstrip('/')}'" for fp in filepaths)
-        cmd = f"{self.ssh_cmd} 'tar czf - -C / {file_list} 2>/dev/null'"
-        
+        members = iter_tar_files(self.ssh_argv, filepaths,
+                                 start_new_session=self.multiplexed)
         try:
-            proc = subprocess.run(cmd, shell=True, capture_output=True, timeout=60)
-            
-            if proc.returncode == 0 and proc.stdout:
-                # Extract from tar
-                tar = tarfile.open(fileobj=io.BytesIO(proc.stdout))
-                
-                for member in tar:
-                    # Map back to original path
-                    original_path = "/" + member.name
-                    if original_path in filepaths:
-                        f = tar.extractfile(member)
-                        if f:
-                            content = f.read().decode('utf-8', errors='replace')
-                            results[original_path] = content
-                            
-                            # Cache the result
-                            cache_key = self._get_cache_key(original_path)
-                            self._save_to_cache(cache_key, content)
+            for original_path, member, data in members:
+                content = data.decode('utf-8', errors='replace')
+                results[original_path] = content
                 
-                tar.close()
+                # Cache the result; the mtime lets later runs
+                # revalidate it without re-reading the file
+                metadata = {'size': member.size, 'mtime': str(int(member.mtime))}
+                self._save_to_cache(self._get_cache_key(original_path), content, metadata)
+                self.stats['bytes_transferred'] += member.size
+        except KeyboardInterrupt:
+            # A multiplexed child is in its own session and did not see
+            # the SIGINT; closing the stream kills it
+            members.close()
+            raise
         except Exception as e:
             print(f"Batch read error: {e}")
-            # Fallback to individual reads
-            for fp in filepaths:
-                if fp not in results:
-                    results[fp] = self.read_file(fp)
+            members.close()
+            if not results:
+                # Stream never got going - fall back to individual reads
+                return self._read_parallel(filepaths)
         
+        # Unreadable / vanished files are simply empty
+        for fp in filepaths:
+            results.setdefault(fp, "")
         return results
     
     def get_stats(self):
@@ -323,25 +441,102 @@ class RemoteFileOptimizer:
                         if self.stats['cache_hits'] + self.stats['cache_misses'] > 0 else 0)
         }
 
+# Per-thread read buffer reused across files by _read_local_file
+_read_buf = threading.local()
+
+# What str.rstrip() removes from ASCII text; bytes.rstrip() on its own
+# would keep the \x1c-\x1f separators, which str.isspace() counts
+_ASCII_WS = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+def _read_local_file(fp):
+    """
+    Read one selected local file; '' if missing or unreadable. Uses a raw
+    open/fstat/readv into a per-thread bytearray that is reused across files
+    (grown only for a larger file), then applies the same universal-newline
+    translation text mode would.
+    
+    Pure-ASCII contents (most source files) are returned as bytes: they are
+    already their own UTF-8 encoding, so they skip both the decode here and
+    the encode when the output is written. Anything else is decoded to str.
+    """
+    try:
+        fd = os.open(fp, os.O_RDONLY)
+    except OSError:
+        return ""
+    try:
+        # size + 1 so a file of exactly `size` bytes ends on one read
+        need = os.fstat(fd).st_size + 1
+        buf = getattr(_read_buf, "buf", None)
+        if buf is None or len(buf) < need:
+            buf = _read_buf.buf = bytearray(max(need, 256 * 1024))
+        n = 0
+        while True:
+            with memoryview(buf) as mv:
+                got = os.readv(fd, [mv[n:]])
+            if not got:
+                break
+            n += got
+            if n == len(buf):               # file grew since fstat
+                buf.extend(bytes(len(buf)))
+        with memoryview(buf) as mv:
+            data = bytes(mv[:n])
+    except OSError:
+        return ""
+    finally:
+        os.close(fd)
+    if data.isascii():
+        if b"\r" in data:
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        return data
+    text = data.decode("utf-8", "replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+def iter_local_texts(filepaths, window=16):
+    """
+    Lazily yield the stripped, non-empty contents of local files in
+    selection order (bytes for ASCII files, see _read_local_file). Reads
+    run on a thread pool (the GIL is released during read), but at most
+    *window* of them are in flight or waiting to be consumed, so when the
+    output is streamed to disk memory is bounded by the window instead of
+    the whole selection.
+    """
+    if not filepaths:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(window, len(filepaths))) as ex:
+        paths = iter(filepaths)
+        pending = deque(ex.submit(_read_local_file, fp) for fp in islice(paths, window))
+        while pending:
+            text = pending.popleft().result()
+            text = text.rstrip(_ASCII_WS) if isinstance(text, bytes) else text.rstrip()
+            fp = next(paths, None)
+            if fp is not None:
+                pending.append(ex.submit(_read_local_file, fp))
+            if text:
+                yield text
+
 # Integration with existing code
 def create_optimized_step2(config):
-    """Enhanced step2 with remote optimizer"""
-    from setup.content_setup import is_rel_path_blacklisted
+    """
+    Enhanced step2 with remote optimizer. Returns the file texts of each
+    segment (a list, or a lazy stream for local segments); see iter_output
+    for how they are joined.
+    """
+    picks = select_all_segments(config)
+    return read_all_segments(config, picks)
+
+def select_all_segments(config):
+    """
+    Run the (interactive, hence sequential) file selection GUI for every
+    segment. Returns (segment, selected files) pairs in config order.
+    """
     from gui import gui_selection
     
-    blobs = []
-    project_root = os.path.abspath(config.get("project_root", os.getcwd()))
+    picks = []
+    project_root = abs_project_root(config)
     color_cycle = ["#e6f3ff", "#f0e6ff", "#e6ffe6", "#ffffe6", "#ffe6e6"]
     
-    # Create optimized remote readers
-    remote_readers = {}
-    
-    for seg in config.get("directories", []):
-        if seg.get("is_remote", False):
-            ssh_cmd = config.get("ssh_command", "")
-            if ssh_cmd and ssh_cmd not in remote_readers:
-                remote_readers[ssh_cmd] = RemoteFileOptimizer(ssh_cmd)
-    
     for idx, seg in enumerate(config.get("directories", [])):
         print(f"\n📁 Starting file selection for segment '{seg['name']}'")
         
@@ -358,46 +553,85 @@ def create_optimized_step2(config):
         )
         
         seg["output_files"] = selected
-        
-        if not selected:
-            continue
-        
-        print(f"  📋 Processing {len(selected)} files with optimizer...")
-        
-        seg_texts = []
-        if seg.get("is_remote"):
-            # Use optimized batch read
-            ssh_cmd = config.get("ssh_command", "")
-            reader = remote_readers.get(ssh_cmd)
-            if reader:
-                file_contents = reader.read_files_batch(selected)
-                for fp in selected:
-                    content = file_contents.get(fp, "").rstrip()
-                    if content:
-                        seg_texts.append(content)
-                
-                # Show performance stats
-                stats = reader.get_stats()
-                print(f"  ✅ Remote read complete - Cache hit rate: {stats['hit_rate']:.1f}%")
-        else:
-            # Read local files (unchanged)
+        if selected:
+            picks.append((seg, selected))
+    
+    return picks
+
+def _read_remote_segments(reader, remote_picks):
+    """
+    Batch-read the selected files of each remote segment in turn over
+    *reader*'s connection and return their stripped, non-empty texts per
+    segment. Closes *reader* when done.
+    """
+    results = []
+    try:
+        for seg, selected in remote_picks:
+            file_contents = reader.read_files_batch(selected)
+            seg_texts = []
             for fp in selected:
-                if os.path.exists(fp):
-                    try:
-                        with open(fp, "r", encoding="utf-8", errors="replace") as f:
-                            seg_texts.append(f.read().rstrip())
-                    except Exception:
-                        pass
-        
-        if seg_texts:
-            blobs.append("\n\n".join(seg_texts))
-            print(f"  ✅ Added {len(seg_texts)} files to output")
+                content = file_contents.get(fp, "").rstrip()
+                if content:
+                    seg_texts.append(content)
+            print(f"  ✅ [{seg['name']}] Remote read complete - "
+                  f"Cache hit rate: {reader.get_stats()['hit_rate']:.1f}%")
+            if seg_texts:
+                print(f"  ✅ [{seg['name']}] Added {len(seg_texts)} files to output")
+            results.append(seg_texts)
+    finally:
+        # Release the multiplexed SSH connection
+        reader.close()
+    return results
+
+def _remote_texts(future, index):
+    """Lazily yield remote segment *index*'s texts once the batch read is done"""
+    yield from future.result()[index]
+
+def read_all_segments(config, picks):
+    """
+    Read the selected files of every segment and return the per-segment
+    texts in the original segment order.
     
-    # Cleanup old cache entries
-    for reader in remote_readers.values():
-        reader._save_to_cache.cache_clear()  # Clear LRU cache if present
+    Remote segments all go through the one configured SSH command, so they
+    share a single RemoteFileOptimizer and are batch-read in turn on one
+    background worker. Local segments are returned as lazy iter_local_texts
+    streams, read while the output is written, so the remote reads overlap
+    the local ones and only a window of local files is held in memory.
+    Each remote segment's entry waits for the background read when the
+    output reaches it.
+    """
+    ssh_cmd = config.get("ssh_command", "")
+    remote_picks = [(seg, selected) for seg, selected in picks
+                    if seg.get("is_remote")] if ssh_cmd else []
+    
+    for seg, selected in picks:
+        print(f"  📋 Processing {len(selected)} files from '{seg['name']}' with optimizer...")
     
-    return "\n\n\n".join(blobs)
+    future = None
+    if remote_picks:
+        reader = RemoteFileOptimizer(ssh_cmd)
+        ex = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            future = ex.submit(_read_remote_segments, reader, remote_picks)
+        except BaseException:
+            reader.close()
+            raise
+        finally:
+            # The worker finishes the submitted read; no further jobs
+            ex.shutdown(wait=False)
+    
+    blobs = []
+    remote_index = 0
+    for seg, selected in picks:
+        if not seg.get("is_remote"):
+            blobs.append(iter_local_texts(selected))
+            print(f"  ✅ [{seg['name']}] Streaming {len(selected)} files to output")
+        elif future is not None:
+            blobs.append(_remote_texts(future, remote_index))
+            remote_index += 1
+    
+    # Per-segment file texts; joined only as they are written out
+    return blobs
 
 # ---------------------------------------------------------------------------
 # Enhanced Configuration Manager
@@ -432,8 +666,7 @@ class ConfigManager:
             return None
         
         try:
-            with open(CONFIG_FILE, "r") as f:
-                config = json.load(f)
+            config = load_file(CONFIG_FILE)
             
             # Validate and migrate if needed
             self._validate_config(config)
@@ -450,6 +683,11 @@ class ConfigManager:
             if field not in config:
                 config[field] = {} if field == "blacklist" else []
         
+        # Compile each root's blacklist once, up front; later lookups through
+        # blacklist_matcher() hit the cache
+        for bl in config["blacklist"].values():
+            blacklist_matcher(bl)
+        
         # Add version if not present
         if 'wizard_version' not in config:
             config['wizard_version'] = '1.0'
@@ -465,21 +703,27 @@ class ConfigManager:
     def save_config(self):
         """Save configuration with backup"""
         if self.config:
-            # Create backup with timestamp
+            # Create backup with timestamp. A hard link costs no I/O; it stays
+            # the old version because the new config replaces the directory
+            # entry below rather than rewriting the inode.
             if os.path.exists(CONFIG_FILE):
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 backup_file = f"{CONFIG_FILE}.backup_{timestamp}"
                 try:
-                    with open(CONFIG_FILE, "r") as f:
-                        with open(backup_file, "w") as bf:
-                            bf.write(f.read())
-                except:
-                    pass
+                    try:
+                        os.unlink(backup_file)
+                    except FileNotFoundError:
+                        pass
+                    os.link(CONFIG_FILE, backup_file)
+                except OSError:
+                    try:
+                        shutil.copyfile(CONFIG_FILE, backup_file)
+                    except OSError:
+                        pass
             
-            # Save new config
+            # Save new config to a temp file, then publish it atomically
             try:
-                with open(CONFIG_FILE, "w") as f:
-                    json.dump(self.config, f, indent=4)
+                dump_file(self.config, CONFIG_FILE, indent=True, atomic=True)
                 return True
             except Exception as e:
                 print(f"⚠️  Error saving configuration: {e}")
@@ -561,6 +805,63 @@ def show_welcome_message():
     """
     print(welcome)
 
+def iter_output(setup_text: str, segments):
+    """
+    Yield the final output piece by piece: step 1 text, then each segment's
+    files separated by blank lines, segments separated by two. Produces the
+    same text the old nested joins did without materialising it.
+    """
+    sep = ""
+    if setup_text.strip():
+        yield setup_text
+        sep = "\n\n"
+    for seg_texts in segments:
+        # Segments may be lazy (see iter_local_texts) and turn out empty
+        wrote = False
+        for text in seg_texts:
+            if sep:
+                yield sep
+            yield text
+            sep = "\n\n"
+            wrote = True
+        if wrote:
+            sep = "\n\n\n"
+
+def line_count(text: str) -> int:
+    """Number of lines in *text*, counted without splitting it into a list"""
+    return text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+
+def write_temp_iter(chunks) -> tuple[str, int, int, int]:
+    """
+    Stream *chunks* into a temporary file. Returns
+    (path, characters, UTF-8 bytes, lines) so callers can report on the
+    output without holding it in memory. Chunks are str, or bytes holding
+    ASCII text (see _read_local_file), which are written as they are.
+    """
+    n_chars = n_bytes = n_lines = 0
+    tail = b""
+    # Binary with a 1 MiB buffer: each str chunk is encoded exactly once,
+    # and the encoded length is the byte count
+    with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".txt",
+                                     buffering=1 << 20) as tf:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if isinstance(chunk, bytes):
+                data = chunk            # ASCII: one byte per character
+            else:
+                data = chunk.encode("utf-8")
+            tf.write(data)
+            n_chars += len(chunk)
+            n_bytes += len(data)
+            # Counted on the bytes: a newline is never part of a multi-byte
+            # UTF-8 sequence, and bytes.count is a plain memchr loop
+            n_lines += data.count(b"\n")
+            tail = data[-1:]
+    if tail and tail != b"\n":
+        n_lines += 1
+    return tf.name, n_chars, n_bytes, n_lines
+
 def write_temp(text: str) -> str:
     """Write text to temporary file"""
     tf = tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".txt", encoding="utf-8")
@@ -568,30 +869,28 @@ def write_temp(text: str) -> str:
     tf.close()
     return tf.name
 
+_EDIT_ORDER = (
+    "background.txt", "rules.txt", "current_goal.txt",
+    ".env", "docker-compose.yml", "nginx.conf"
+)
+_EDIT_ALLOWED = frozenset(_EDIT_ORDER)
+
 def edit_files(files: list[str], cfg: dict):
     """Edit configuration files"""
-    allowed = {
-        "background.txt", "rules.txt", "current_goal.txt",
-        ".env", "docker-compose.yml", "nginx.conf"
-    }
-    order = [
-        "background.txt", "rules.txt", "current_goal.txt",
-        ".env", "docker-compose.yml", "nginx.conf"
-    ]
-    
+    # One validated, de-duplicated target list drives the single loop below
     if any(f.lower() == "all" for f in files):
-        targets = order
+        targets = _EDIT_ORDER
     else:
-        for f in files:
-            if f not in allowed:
-                print(f"❌ Error: --edit accepts only: {', '.join(sorted(allowed))} or 'all'")
-                sys.exit(1)
-        targets = files
+        targets = tuple(dict.fromkeys(files))
+        bad = [f for f in targets if f not in _EDIT_ALLOWED]
+        if bad:
+            print(f"❌ Error: unknown file(s) {', '.join(bad)}; --edit accepts only: "
+                  f"{', '.join(sorted(_EDIT_ALLOWED))} or 'all'")
+            sys.exit(1)
 
+    project_root = abs_project_root(cfg)
     for fname in targets:
-        path = (os.path.join(INSTRUCTIONS_DIR, fname)
-                if fname in {"background.txt", "rules.txt", "current_goal.txt"}
-                else os.path.join(cfg.get("project_root", os.getcwd()), fname))
+        path = INSTRUCTION_PATHS.get(fname) or os.path.join(project_root, fname)
         
         if not os.path.exists(path):
             print(f"⚠️  {fname} not found at {path}")
@@ -600,6 +899,30 @@ def edit_files(files: list[str], cfg: dict):
         print(f"✏️  Editing {fname}...")
         edit_file_tk(path)
 
+def _iter_tree(root):
+    """
+    Yield (is_dir, rel_path, DirEntry) for everything below root. Like
+    os.walk, symlinked directories are counted but not descended into and
+    unreadable directories are skipped.
+    """
+    stack = [("", root)]
+    while stack:
+        rel, path = stack.pop()
+        try:
+            it = os.scandir(path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                rel_path = rel + entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir and not entry.is_symlink():
+                    stack.append((rel_path + os.sep, entry.path))
+                yield is_dir, rel_path, entry
+
 def show_project_stats(cfg):
     """Show enhanced project statistics"""
     print("\n📊 Project Statistics")
@@ -622,24 +945,23 @@ def show_project_stats(cfg):
                 dir_count = 0
                 bl_count = 0
                 size_count = 0
-                bl_list = cfg.get("blacklist", {}).get(seg["directory"], [])
+                # Compiled once per blacklist (see ConfigManager._validate_config)
+                bl_match = blacklist_matcher(cfg.get("blacklist", {}).get(seg["directory"], []))
                 
-                for root, dirs, files in os.walk(seg["directory"]):
-                    dir_count += len(dirs)
-                    file_count += len(files)
+                for is_dir, rel, entry in _iter_tree(seg["directory"]):
+                    if is_dir:
+                        dir_count += 1
+                        continue
+                    file_count += 1
                     
                     # Count blacklisted and size
-                    for f in files:
-                        filepath = os.path.join(root, f)
-                        rel = os.path.relpath(filepath, seg["directory"])
-                        
-                        if any(rel.startswith(b) for b in bl_list):
-                            bl_count += 1
-                        else:
-                            try:
-                                size_count += os.path.getsize(filepath)
-                            except:
-                                pass
+                    if bl_match(rel):
+                        bl_count += 1
+                    else:
+                        try:
+                            size_count += entry.stat().st_size
+                        except OSError:
+                            pass
                 
                 print(f"   Files: {file_count:,}")
                 print(f"   Directories: {dir_count:,}")
@@ -669,62 +991,88 @@ def format_size(bytes):
         bytes /= 1024.0
     return f"{bytes:.1f} PB"
 
+def load_selection_subset(path, names):
+    """
+    Load the selection state keeping only the segments in *names*. The file
+    is memory-mapped and parsed straight from the mapping (orjson accepts
+    the buffer directly), so a large state file is never copied into a
+    Python bytes/str first, and unwanted segments are dropped immediately.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if orjson is not None:
+                with memoryview(mm) as mv:
+                    state = orjson.loads(mv)
+            else:
+                state = loads(mm[:])
+    return {k: v for k, v in state.items() if k in names}
+
+def step2_standard(cfg):
+    """
+    Run the standard step2 GUI, shaped like create_optimized_step2: local
+    segments are lazy iter_local_texts streams, read while the output is
+    written instead of all being held in memory first.
+    """
+    return step2_segment_texts(cfg, read_local=iter_local_texts)
+
 def build_from_last_selection(cfg):
-    """Build output from last saved selection (quick mode)"""
+    """
+    Build output from last saved selection (quick mode). Returns the file
+    texts of each segment, like create_optimized_step2.
+    """
+    if not os.path.exists("selection_state.json"):
+        print("⚠️  No previous selection found")
+        return []
+    
+    # *cfg* is the config main() loaded (and apply_single_root adjusted) for
+    # this run; re-reading the file here would put back the raw single-root
+    # "directories" and leave step1 describing a different config
+    
+    # Only the configured segments' selections are kept from the state file
     try:
-        with open("selection_state.json", "r") as f:
-            state = json.load(f)
+        state = load_selection_subset("selection_state.json",
+                                      {seg["name"] for seg in cfg.get("directories", [])})
     except:
         print("⚠️  No previous selection found")
-        return ""
-    
-    # Always reload config to get latest changes
-    from setup.constants import CONFIG_FILE
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r") as f:
-                fresh_config = json.load(f)
-            # Update the passed config with fresh values
-            cfg.update(fresh_config)
-        except:
-            pass
+        return []
     
     blobs = []
+    # Same reader as the GUI path: its disk cache survives between runs, so
+    # unchanged files cost one stat instead of a transfer. One reader (and
+    # SSH master) serves every remote segment.
+    reader = None
+    if any(seg.get("is_remote") and state.get(seg["name"])
+           for seg in cfg.get("directories", [])):
+        reader = RemoteFileOptimizer(cfg.get("ssh_command", ""))
     
-    for seg in cfg.get("directories", []):
-        selected = state.get(seg["name"], [])
-        if not selected:
-            continue
-        
-        print(f"  📋 Processing {len(selected)} files from '{seg['name']}'...")
-        
-        seg_texts = []
-        if seg.get("is_remote"):
-            # Use remote reading logic
-            ssh_cmd = cfg.get("ssh_command", "")
-            for fp in selected:
-                try:
-                    proc = subprocess.run(
-                        ssh_cmd.split() + ["cat", fp],
-                        capture_output=True, text=True, timeout=10
-                    )
-                    if proc.returncode == 0:
-                        seg_texts.append(proc.stdout.rstrip())
-                except:
-                    pass
-        else:
-            for fp in selected:
-                if os.path.exists(fp):
-                    try:
-                        with open(fp, "r", encoding="utf-8", errors="replace") as f:
-                            seg_texts.append(f.read().rstrip())
-                    except:
-                        pass
-        
-        if seg_texts:
-            blobs.append("\n\n".join(seg_texts))
+    try:
+        for seg in cfg.get("directories", []):
+            selected = state.get(seg["name"], [])
+            if not selected:
+                continue
+            
+            print(f"  📋 Processing {len(selected)} files from '{seg['name']}'...")
+            
+            seg_texts = []
+            if seg.get("is_remote"):
+                file_contents = reader.read_files_batch(selected)
+                for fp in selected:
+                    content = file_contents.get(fp, "").rstrip()
+                    if content:
+                        seg_texts.append(content)
+            else:
+                # Read while the output is written, a window of files at a time
+                seg_texts = iter_local_texts(selected)
+            
+            if seg_texts:
+                blobs.append(seg_texts)
+    finally:
+        if reader is not None:
+            reader.close()
     
-    return "\n\n\n".join(blobs)
+    return blobs
 
 def save_performance_stats(elapsed_time, output_size):
     """Save performance statistics"""
@@ -732,8 +1080,7 @@ def save_performance_stats(elapsed_time, output_size):
     
     try:
         if os.path.exists(stats_file):
-            with open(stats_file, "r") as f:
-                stats = json.load(f)
+            stats = load_file(stats_file)
         else:
             stats = {"runs": []}
         
@@ -746,8 +1093,7 @@ def save_performance_stats(elapsed_time, output_size):
         # Keep only last 100 runs
         stats["runs"] = stats["runs"][-100:]
         
-        with open(stats_file, "w") as f:
-            json.dump(stats, f, indent=2)
+        dump_file(stats, stats_file, indent=True)
     except:
         pass
 
@@ -760,8 +1106,7 @@ def show_performance_stats():
         return
     
     try:
-        with open(stats_file, "r") as f:
-            stats = json.load(f)
+        stats = load_file(stats_file)
         
         runs = stats.get("runs", [])
         if not runs:
@@ -796,6 +1141,16 @@ def show_performance_stats():
 # ---------------------------------------------------------------------------
 # Main function
 # ---------------------------------------------------------------------------
+def apply_single_root(cfg):
+    """Single-root convenience: expose the project root as the only segment"""
+    if cfg.get("has_single_root"):
+        pr = abs_project_root(cfg)
+        cfg["directories"] = [{
+            "name": os.path.basename(pr) or pr,
+            "is_remote": cfg.get("system_type") == "remote",
+            "directory": pr
+        }]
+
 def main():
     # Show welcome message
     show_welcome_message()
@@ -847,6 +1202,7 @@ Examples:
                 os.remove(cf)
                 print(f"✅ Cleared {cf}")
                 cleared += 1
+        clear_tree_cache()
         if cleared == 0:
             print("ℹ️  No cache files found")
         sys.exit(0)
@@ -890,13 +1246,7 @@ Examples:
         sys.exit(0)
     
     # Single-root convenience
-    if cfg.get("has_single_root"):
-        pr = os.path.abspath(cfg.get("project_root", os.getcwd()))
-        cfg["directories"] = [{
-            "name": os.path.basename(pr) or pr,
-            "is_remote": cfg.get("system_type") == "remote",
-            "directory": pr
-        }]
+    apply_single_root(cfg)
     
     # Build output text
     print("\n🔨 Building project context...")
@@ -906,92 +1256,62 @@ Examples:
     setup_text = step1(cfg)
     
     if args.step1:
-        print(f"\n📄 Step 1 output: {len(setup_text.splitlines())} lines")
-        open_in_editor(write_temp(setup_text))
+        print(f"\n📄 Step 1 output: {line_count(setup_text)} lines")
+        exec_in_editor(write_temp(setup_text))
         sys.exit(0)
     
     # Step 2 - file selection
     if args.quick:
         # Quick mode - use last selection
         print("\n⚡ Quick mode - using previous file selection")
-        segment_text = build_from_last_selection(cfg)
-        
-        # IMPORTANT: Reload config and regenerate step1 after quick mode
-        config_mgr = ConfigManager()
-        cfg = config_mgr.load_config()
-        
-        # Single-root convenience (again after reload)
-        if cfg.get("has_single_root"):
-            pr = os.path.abspath(cfg.get("project_root", os.getcwd()))
-            cfg["directories"] = [{
-                "name": os.path.basename(pr) or pr,
-                "is_remote": cfg.get("system_type") == "remote",
-                "directory": pr
-            }]
-        
-        print("\n🔄 Regenerating step1 with latest config...")
-        setup_text = step1(cfg)
-        
-    elif args.optimized or any(d.get("is_remote") for d in cfg.get("directories", [])):
-        # Use optimized version for remote or if requested
-        segment_text = create_optimized_step2(cfg)
-        
-        # IMPORTANT: Reload config and regenerate step1 after GUI
-        config_mgr = ConfigManager()
-        cfg = config_mgr.load_config()
-        
-        # Single-root convenience (again after reload)
-        if cfg.get("has_single_root"):
-            pr = os.path.abspath(cfg.get("project_root", os.getcwd()))
-            cfg["directories"] = [{
-                "name": os.path.basename(pr) or pr,
-                "is_remote": cfg.get("system_type") == "remote",
-                "directory": pr
-            }]
-        
-        print("\n🔄 Regenerating step1 with latest config...")
-        setup_text = step1(cfg)
+        segments = build_from_last_selection(cfg)
+        # No GUI ran and the config is not reloaded, so cfg is the one step1
+        # was generated from above; its output is still current
         
     else:
-        # Normal mode with GUI - pass config to step2_all_segments
-        segment_text = step2_all_segments(cfg)
+        # GUI selection: the optimized flow for remote projects or when
+        # requested, otherwise the standard step2 GUI
+        if args.optimized or any(d.get("is_remote") for d in cfg.get("directories", [])):
+            step2_impl = create_optimized_step2
+        else:
+            step2_impl = step2_standard
+        load_gui()
+        segments = step2_impl(cfg)
+        
+        # Remote trees were cached before the GUI opened; files may have
+        # been added or removed on the host while it was up
+        clear_tree_cache(remote_only=True)
         
         # IMPORTANT: Reload config and regenerate step1 after GUI closes
         # This ensures any config changes made in the GUI are reflected
-        config_mgr = ConfigManager()
-        cfg = config_mgr.load_config()
+        # (ConfigManager loads it on construction; no second load needed)
+        cfg = ConfigManager().config
         
         # Single-root convenience (again after reload)
-        if cfg.get("has_single_root"):
-            pr = os.path.abspath(cfg.get("project_root", os.getcwd()))
-            cfg["directories"] = [{
-                "name": os.path.basename(pr) or pr,
-                "is_remote": cfg.get("system_type") == "remote",
-                "directory": pr
-            }]
+        apply_single_root(cfg)
         
         print("\n🔄 Regenerating step1 with latest config...")
         setup_text = step1(cfg)
     
-    # Combine outputs
-    final_text = "\n\n".join([p for p in [setup_text, segment_text] if p.strip()])
+    # Combine outputs straight into the temp file
+    out_path, n_chars, n_bytes, n_lines = write_temp_iter(iter_output(setup_text, segments))
     
     # Calculate statistics
     elapsed_time = time.time() - start_time
     
     # Show summary
     print(f"\n📊 Summary:")
-    print(f"  Total lines: {len(final_text.splitlines()):,}")
-    print(f"  Total size: {format_size(len(final_text.encode('utf-8')))}")
+    print(f"  Total lines: {n_lines:,}")
+    print(f"  Total size: {format_size(n_bytes)}")
     print(f"  Segments: {len(cfg.get('directories', []))}")
     print(f"  Processing time: {elapsed_time:.1f}s")
     
     # Save performance stats
-    save_performance_stats(elapsed_time, len(final_text))
+    save_performance_stats(elapsed_time, n_chars)
     
     # Open in editor
     print("\n📝 Opening in editor...")
-    open_in_editor(write_temp(final_text))
+    exec_in_editor(out_path)
 
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
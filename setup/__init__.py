@@ -1,16 +1,37 @@
 """
 Setup package for GPT Helper - Consolidated version
 """
+import importlib
 
-# Import main setup functionality
-from .wizard_base import SetupWizard, WizardStep
-from .overall_setup import OverallSetupStep
-from .directory_config import DirectoryConfigStep  
-from .blacklist_setup import BlacklistSetupStep
-from .content_setup import ContentSetupStep
+# Wizard classes are resolved lazily (PEP 562): importing a light submodule
+# such as setup.constants must not drag in Tk and every wizard step.
+_LAZY = {
+    'SetupWizard': '.wizard_base',
+    'WizardStep': '.wizard_base',
+    'OverallSetupStep': '.overall_setup',
+    'DirectoryConfigStep': '.directory_config',
+    'BlacklistSetupStep': '.blacklist_setup',
+    'ContentSetupStep': '.content_setup',
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 def run_setup():
     """Run the consolidated setup wizard"""
+    from .wizard_base import SetupWizard
+    from .overall_setup import OverallSetupStep
+    from .directory_config import DirectoryConfigStep
+    from .blacklist_setup import BlacklistSetupStep
+    from .content_setup import ContentSetupStep
+
     # Create wizard instance
     wizard = SetupWizard()
     
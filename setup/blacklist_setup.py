@@ -9,7 +9,6 @@ import sys
 import subprocess
 import tkinter as tk
 from tkinter import ttk, messagebox
-import fnmatch
 import threading
 import time
 import json
@@ -20,6 +19,7 @@ from typing import Dict, List, Set, Optional, Tuple
 from setup.constants import CONFIG_FILE, INSTRUCTIONS_DIR
 from setup.remote_utils import build_remote_tree_widget
 from setup.content_setup import is_rel_path_blacklisted
+from setup.blacklist_utils import glob_matcher
 from .wizard_base import WizardStep, create_info_box
 
 class DirectoryCache:
@@ -294,14 +294,7 @@ class PaginatedTreeWidget:
                 return True
         
         # Check patterns
-        for pattern in blacklist:
-            if '*' in pattern or '?' in pattern:
-                if fnmatch.fnmatch(rel_path, pattern):
-                    return True
-                if fnmatch.fnmatch(os.path.basename(rel_path), pattern):
-                    return True
-        
-        return False
+        return glob_matcher(blacklist)(rel_path)
     
     def _has_blacklisted_children(self, item):
         """Check if an item has any blacklisted children"""
@@ -1297,14 +1290,7 @@ class BlacklistSetupStep(WizardStep):
                 return True
         
         # Check patterns
-        for pattern in blacklist:
-            if '*' in pattern or '?' in pattern:
-                if fnmatch.fnmatch(rel_path, pattern):
-                    return True
-                if fnmatch.fnmatch(os.path.basename(rel_path), pattern):
-                    return True
-        
-        return False
+        return glob_matcher(blacklist)(rel_path)
     
     def _apply_preset(self, patterns):
         """Apply preset patterns"""
@@ -0,0 +1,107 @@
+# gpt_helper/dev/setup/blacklist_utils.py
+"""
+Blacklist matching helpers, and the relative paths they are checked
+against. Kept free of Tk so command-line paths (tree output, stats) can use
+them without loading the GUI toolkit.
+"""
+import fnmatch
+import os
+import re
+from functools import lru_cache
+
+
+def is_rel_path_blacklisted(rel_path: str, blacklisted_list: list) -> bool:
+    """
+    Returns True iff `rel_path` (or any of its parents) is listed in blacklist.
+    """
+    rel_path = rel_path.strip("/\\")
+    for blk in blacklisted_list:
+        blk = blk.strip("/\\")
+        if rel_path == blk or rel_path.startswith((blk + os.sep, blk + "/")):
+            return True
+    return False
+
+def _never(rel_path: str) -> bool:
+    return False
+
+def blacklist_matcher(blacklisted_list: list):
+    """
+    Return a predicate with the same semantics as `is_rel_path_blacklisted`
+    for a fixed blacklist. The list is normalised into a set once, so a
+    check is one set lookup for the path itself plus a cached answer for its
+    parent directory: siblings share the parent, so each distinct directory
+    is looked up only once.
+    
+    Matchers are shared per distinct blacklist, so a GUI that reloads its
+    tree, or several views over the same root, reuse the answers already
+    worked out instead of starting cold.
+    """
+    if not blacklisted_list:
+        return _never
+    return _matcher(tuple(blacklisted_list))
+
+@lru_cache(maxsize=32)
+def _matcher(blacklist: tuple):
+    entries = frozenset(e.strip("/\\").replace("\\", "/") for e in blacklist)
+
+    @lru_cache(maxsize=4096)
+    def dir_blocked(rel_dir: str) -> bool:
+        if rel_dir in entries:
+            return True
+        i = rel_dir.rfind("/")
+        return i != -1 and dir_blocked(rel_dir[:i])
+
+    def match(rel_path: str) -> bool:
+        rel = rel_path.strip("/\\").replace("\\", "/")
+        if rel in entries:
+            return True
+        i = rel.rfind("/")
+        return i != -1 and dir_blocked(rel[:i])
+    return match
+
+def glob_matcher(patterns):
+    """
+    Return a predicate telling whether a relative path, or its basename,
+    matches any of the wildcard ('*' / '?') entries in *patterns* under
+    fnmatch rules; entries without wildcards are ignored. The wildcards are
+    compiled into one alternation, so a check is one or two regex matches
+    however many patterns there are, and the compiled predicate is shared
+    per distinct pattern set.
+    """
+    return _glob_matcher(frozenset(patterns))
+
+@lru_cache(maxsize=32)
+def _glob_matcher(patterns: frozenset):
+    globs = sorted(os.path.normcase(p) for p in patterns if "*" in p or "?" in p)
+    if not globs:
+        return _never
+    rx = re.compile("|".join(fnmatch.translate(p) for p in globs)).match
+    normcase, basename = os.path.normcase, os.path.basename
+
+    def match(rel_path: str) -> bool:
+        rel = normcase(rel_path)
+        return rx(rel) is not None or rx(basename(rel)) is not None
+    return match
+
+def relpath_from(base: str):
+    """
+    Return a function computing ``os.path.relpath(path, base)``. Paths under
+    *base* (the usual case: they were built by joining onto it) are sliced
+    off a prefix computed once, instead of relpath making both paths
+    absolute and splitting them into components on every call.
+    """
+    sep = os.sep
+    prefix = os.path.join(os.path.abspath(base), "")
+    plen = len(prefix)
+    dot, dsep = sep + ".", sep + sep
+
+    def rel(path: str) -> str:
+        if path.startswith(prefix):
+            tail = path[plen:]
+            # Only already-normalised tails can be used as they are; '.',
+            # '..', doubled or trailing separators go through relpath
+            if (tail and tail[0] != "." and tail[0] != sep and tail[-1] != sep
+                    and dot not in tail and dsep not in tail):
+                return tail
+        return os.path.relpath(path, base)
+    return rel
@@ -5,5 +5,9 @@ import os
 CONFIG_FILE = "gpt_helper_config.json"
 INSTRUCTIONS_DIR = os.path.join(os.getcwd(), "instructions")
 
+# Instruction files step1 assembles, and their full paths (joined once here)
+INSTRUCTION_FILES = ("background.txt", "rules.txt", "current_goal.txt")
+INSTRUCTION_PATHS = {name: os.path.join(INSTRUCTIONS_DIR, name) for name in INSTRUCTION_FILES}
+
 # Create instructions directory if it doesn't exist
 os.makedirs(INSTRUCTIONS_DIR, exist_ok=True)
@@ -5,7 +5,6 @@ Merged version combining classic and enhanced functionality
 """
 import os
 import sys
-import json
 import tkinter as tk
 from tkinter import scrolledtext, ttk, messagebox
 from setup.constants import CONFIG_FILE, INSTRUCTIONS_DIR
@@ -19,19 +18,12 @@ except ImportError:
     ENHANCED_WIZARD_AVAILABLE = False
 
 # ---------------------------------------------------------------------------
-# Utility - MOVED OUTSIDE OF run_content_setup SO IT CAN BE IMPORTED
+# Utility - lives in setup.blacklist_utils (no Tk import); re-exported here
+# for existing callers
 # ---------------------------------------------------------------------------
-
-def is_rel_path_blacklisted(rel_path: str, blacklisted_list: list) -> bool:
-    """
-    Returns True iff `rel_path` (or any of its parents) is listed in blacklist.
-    """
-    rel_path = rel_path.strip("/\\")
-    for blk in blacklisted_list:
-        blk = blk.strip("/\\")
-        if rel_path == blk or rel_path.startswith(blk + os.sep) or rel_path.startswith(blk + "/"):
-            return True
-    return False
+from setup.blacklist_utils import is_rel_path_blacklisted, blacklist_matcher
+from setup.json_utils import dump_file
+from setup.tree_utils import LazyTreeChildren
 
 # ---------------------------------------------------------------------------
 # Enhanced Content Setup Class
@@ -1168,6 +1160,8 @@ def run_content_setup(config: dict):
             values=(root_path,)
         )
 
+        is_blacklisted = blacklist_matcher(blacklist)
+
         def insert_items(parent_id, rel_dir: str):
             abs_dir = os.path.join(root_path, rel_dir)
             try:
@@ -1177,7 +1171,7 @@ def run_content_setup(config: dict):
             for itm in items:
                 rel_itm = os.path.join(rel_dir, itm).strip("/\\")
                 abs_itm = os.path.join(root_path, rel_itm)
-                if is_rel_path_blacklisted(rel_itm, blacklist):
+                if is_blacklisted(rel_itm):
                     continue
                 node_id = tree.insert(
                     parent_id, "end",
@@ -1186,12 +1180,16 @@ def run_content_setup(config: dict):
                     values=(abs_itm,)
                 )
                 if os.path.isdir(abs_itm):
-                    insert_items(node_id, rel_itm)
+                    lazy.add_placeholder(node_id, rel_itm)
 
+        # Directories are listed when first opened
+        lazy = LazyTreeChildren(tree, insert_items)
         insert_items(root_id, "")
 
         def toggle(event):
             iid = tree.focus()
+            if not tree.item(iid, "values"):
+                return  # placeholder row
             txt = tree.item(iid, "text")
             tree.item(iid, text=("[x]" if txt.startswith("[ ]") else "[ ]") + txt[3:])
         tree.bind("<Double-1>", toggle)
@@ -1234,42 +1232,31 @@ def run_content_setup(config: dict):
         show_content_fields()
 
     # ---------------- Build dynamic UI for phase-1 ------------------------------
-    def update_file_selection():
-        for w in file_sel_frame.winfo_children():
-            w.destroy()
+    # Each answer's panel is built the first time it is chosen and then
+    # only re-packed: flipping Yes/No keeps the pickers (and their [x]
+    # marks) instead of destroying them and listing the roots again
+    panels: dict[int, tk.Frame] = {}
 
-        if output_files_var.get() == 1:
-            tk.Label(
-                file_sel_frame,
-                text="Double-click items to mark with [x] and include their content each run:"
-            ).pack(anchor="w", pady=5)
+    def update_file_selection():
+        choice = output_files_var.get()
+        for w in panels.values():
+            w.pack_forget()
+        panel = panels.get(choice)
+        if panel is None:
+            panel = panels[choice] = tk.Frame(file_sel_frame)
+            if choice == 1:
+                tk.Label(
+                    panel,
+                    text="Double-click items to mark with [x] and include their content each run:"
+                ).pack(anchor="w", pady=5)
 
-            if config.get("has_single_root"):
-                frame = tk.Frame(file_sel_frame, relief="solid", borderwidth=1)
-                frame.pack(fill="both", expand=True, padx=5, pady=5)
-                tk.Label(frame, text="Project Root").pack(anchor="w")
-                root = config["project_root"]
-                bl   = config.get("blacklist", {}).get(root, [])
-                if config.get("system_type") == "remote":
-                    tree = build_remote_tree_widget(
-                        frame, root,
-                        ssh_cmd=config.get("ssh_command", ""),
-                        blacklist=config.get("blacklist", {})
-                    )
-                else:
-                    tree = build_local_tree_widget(frame, root, bl)
-                tree.pack(fill="both", expand=True)
-                selection_trees[0] = tree
-            else:
-                cols = tk.Frame(file_sel_frame)
-                cols.pack(fill="both", expand=True)
-                for idx, seg in enumerate(config.get("directories", [])):
-                    frame = tk.Frame(cols, relief="solid", borderwidth=1)
-                    frame.grid(row=0, column=idx, padx=5, sticky="n")
-                    tk.Label(frame, text=seg["name"]).pack(anchor="w")
-                    root = seg["directory"]
-                    bl = config.get("blacklist", {}).get(root, [])
-                    if seg.get("is_remote"):
+                if config.get("has_single_root"):
+                    frame = tk.Frame(panel, relief="solid", borderwidth=1)
+                    frame.pack(fill="both", expand=True, padx=5, pady=5)
+                    tk.Label(frame, text="Project Root").pack(anchor="w")
+                    root = config["project_root"]
+                    bl   = config.get("blacklist", {}).get(root, [])
+                    if config.get("system_type") == "remote":
                         tree = build_remote_tree_widget(
                             frame, root,
                             ssh_cmd=config.get("ssh_command", ""),
@@ -1278,9 +1265,30 @@ def run_content_setup(config: dict):
                     else:
                         tree = build_local_tree_widget(frame, root, bl)
                     tree.pack(fill="both", expand=True)
-                    selection_trees[idx] = tree
-        else:
-            tk.Label(file_sel_frame, text="No additional files will be appended.").pack(pady=20)
+                    selection_trees[0] = tree
+                else:
+                    cols = tk.Frame(panel)
+                    cols.pack(fill="both", expand=True)
+                    for idx, seg in enumerate(config.get("directories", [])):
+                        frame = tk.Frame(cols, relief="solid", borderwidth=1)
+                        frame.grid(row=0, column=idx, padx=5, sticky="n")
+                        tk.Label(frame, text=seg["name"]).pack(anchor="w")
+                        root = seg["directory"]
+                        bl = config.get("blacklist", {}).get(root, [])
+                        if seg.get("is_remote"):
+                            tree = build_remote_tree_widget(
+                                frame, root,
+                                ssh_cmd=config.get("ssh_command", ""),
+                                blacklist=config.get("blacklist", {})
+                            )
+                        else:
+                            tree = build_local_tree_widget(frame, root, bl)
+                        tree.pack(fill="both", expand=True)
+                        selection_trees[idx] = tree
+            else:
+                tk.Label(panel, text="No additional files will be appended.").pack(pady=20)
+
+        panel.pack(fill="both", expand=True)
 
         next_btn.configure(text="Proceed", command=proceed_file_selection)
 
@@ -1335,8 +1343,7 @@ def run_content_setup(config: dict):
             config["current_goal"] = txt_goal.get("1.0", tk.END).rstrip("\n")
 
             try:
-                with open(CONFIG_FILE, "w") as jf:
-                    json.dump(config, jf, indent=4)
+                dump_file(config, CONFIG_FILE, indent=True)
             except Exception as e:
                 print(f"Error saving {CONFIG_FILE}: {e}")
 
@@ -112,10 +112,11 @@ class ProjectAnalyzer:
         matches = []
         try:
             for root, dirs, files in os.walk(self.root_path):
-                # Limit depth
+                # Limit depth: stop descending at the last level searched
+                # rather than walking (and skipping) everything below it
                 depth = len(Path(root).relative_to(self.root_path).parts)
-                if depth > 3:
-                    continue
+                if depth >= 3:
+                    dirs[:] = []
                 
                 for file in files:
                     if fnmatch.fnmatch(file, pattern):
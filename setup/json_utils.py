@@ -0,0 +1,70 @@
+# gpt_helper/dev/setup/json_utils.py
+"""
+JSON file helpers for the config and selection-state files. Uses orjson when
+installed, then ujson, then the stdlib json module. Files are always read and
+written as bytes, which suits orjson (it returns bytes) and works for all three.
+"""
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    try:
+        import ujson
+    except ImportError:
+        ujson = None
+
+if orjson is not None:
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj, indent=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+elif ujson is not None:
+    def loads(data):
+        return ujson.loads(data)
+
+    def dumps(obj, indent=False):
+        return ujson.dumps(obj, indent=2 if indent else 0,
+                           ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+else:
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(obj, indent=False):
+        # Compact separators unless indenting, like orjson and ujson
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def load_file(path):
+    """Parse the JSON file at *path*"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path, indent=False, atomic=False):
+    """
+    Write *obj* to *path* as JSON, 2-space indented if *indent*. With
+    *atomic*, the data goes to a temporary file beside *path* that is then
+    renamed over it, so a crash mid-write leaves the previous file intact.
+    """
+    data = dumps(obj, indent)
+    if not atomic:
+        with open(path, "wb") as f:
+            f.write(data)
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
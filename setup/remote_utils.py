@@ -2,7 +2,9 @@
 
 import os
 import subprocess
-from tkinter import ttk
+
+from setup.blacklist_utils import blacklist_matcher
+from setup.tree_utils import LazyTreeChildren
 
 def get_remote_tree(root_path, ssh_cmd, timeout=30):
     """
@@ -29,9 +31,16 @@ def parse_remote_tree(lines, root_path):
     representing the directory tree.
     """
     tree_dict = {}
+    # find prints every path under the root it was given, so the relative
+    # part is a plain slice; relpath is only needed for anything unexpected
+    prefix = root_path.rstrip("/") + "/"
+    plen = len(prefix)
     for full_path in lines:
-        rel = os.path.relpath(full_path, root_path)
-        if rel == ".":
+        if full_path.startswith(prefix):
+            rel = full_path[plen:].rstrip("/")
+        else:
+            rel = os.path.relpath(full_path, root_path)
+        if not rel or rel == ".":
             continue
         parts = rel.split(os.sep)
         current = tree_dict
@@ -55,14 +64,19 @@ def filter_tree_dict(tree_dict, current_path, blacklist, base_path):
     Recursively filter out entries from the tree dictionary whose relative paths
     (computed from the base_path) are blacklisted.
     """
+    # Relative path from the original project root (base_path), computed
+    # once here and then extended by plain concatenation per level
+    rel = os.path.relpath(current_path, base_path)
+    rel_prefix = "" if rel == "." else rel + "/"
+    return _filter_tree(tree_dict, rel_prefix, blacklist_matcher(blacklist))
+
+def _filter_tree(tree_dict, rel_prefix, bl_match):
     filtered = {}
     for name, subdict in tree_dict.items():
-        full_path = os.path.join(current_path, name)
-        # Compute the relative path from the original project root (base_path)
-        rel = os.path.relpath(full_path, base_path)
-        if is_rel_path_blacklisted(rel, blacklist):
+        rel = rel_prefix + name
+        if bl_match(rel):
             continue
-        filtered[name] = filter_tree_dict(subdict, full_path, blacklist, base_path)
+        filtered[name] = _filter_tree(subdict, rel + "/", bl_match)
     return filtered
 
 def build_remote_tree_widget(parent, root_path, ssh_cmd, blacklist=None, state_dict=None):
@@ -75,6 +89,7 @@ def build_remote_tree_widget(parent, root_path, ssh_cmd, blacklist=None, state_d
     
     state_dict (e.g. your global blacklist_states) is updated for every inserted item.
     """
+    from tkinter import ttk
     from setup.blacklist_setup import on_item_double_click
 
     tree = ttk.Treeview(parent)
@@ -99,8 +114,13 @@ def build_remote_tree_widget(parent, root_path, ssh_cmd, blacklist=None, state_d
             item_id = tree.insert(parent_id, "end", text=display_text, open=False, values=(full_path,))
             if state_dict is not None:
                 state_dict[full_path] = False
-            insert_from_dict(item_id, subdict, full_path)
+            if subdict:
+                lazy.add_placeholder(item_id, (subdict, full_path))
 
+    # Sub-directories get their rows when first opened. The whole listing
+    # is already in tree_dict, so this only saves creating rows nobody
+    # looks at.
+    lazy = LazyTreeChildren(tree, lambda item_id, entry: insert_from_dict(item_id, *entry))
     insert_from_dict(root_id, tree_dict, root_path)
     tree.bind("<Double-1>", lambda event, tree=tree: on_item_double_click(event, tree))
     return tree
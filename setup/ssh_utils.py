@@ -0,0 +1,98 @@
+# gpt_helper/dev/setup/ssh_utils.py
+"""
+SSH connection-sharing options shared by every remote path (main's
+RemoteFileOptimizer, step1's remote reads, annotate_files), so they all
+use one ControlPath and reuse whichever master is already up, plus the
+one-session tar read of many remote files. Kept free of Tk.
+"""
+import os
+import shlex
+import subprocess
+import tarfile
+import threading
+
+# One socket per user@host:port under ~/.ssh, like OpenSSH's own examples
+CONTROL_PATH = "~/.ssh/cm-%r@%h:%p"
+
+MUX_OPTS = (
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPersist=60s",
+    "-o", f"ControlPath={CONTROL_PATH}",
+)
+
+
+def with_opts(argv: list, *opts) -> list:
+    """*argv* with *opts* placed right after the ssh binary"""
+    return argv[:1] + list(opts) + argv[1:]
+
+
+def is_openssh(argv: list) -> bool:
+    """True when *argv* runs a plain `ssh` binary (not a wrapper script)"""
+    return bool(argv) and os.path.basename(argv[0]) == "ssh"
+
+
+def ensure_control_dir():
+    """Create ~/.ssh if needed; ssh will not create it for the socket"""
+    try:
+        os.makedirs(os.path.expanduser("~/.ssh"), mode=0o700, exist_ok=True)
+    except OSError:
+        pass
+
+
+def ssh_argv(ssh_cmd: str) -> list:
+    """
+    Split the user's SSH command once into an argv list.  For a plain `ssh`
+    binary, the shared connection-sharing options are injected so every
+    later remote call rides the same authenticated connection (unless the
+    user already configured ControlMaster themselves).
+    """
+    argv = shlex.split(ssh_cmd)
+    if is_openssh(argv) and not any("ControlMaster" in a for a in argv):
+        ensure_control_dir()
+        argv[1:1] = MUX_OPTS
+    return argv
+
+
+def iter_tar_files(argv: list, filepaths, start_new_session: bool = False):
+    """
+    Read the remote files *filepaths* in one ssh session running `tar`, and
+    yield (path, TarInfo, data bytes) as each member arrives.  The path list
+    goes to tar on stdin (no ARG_MAX limit, no quoting issues) and the
+    archive is parsed as a stream, so nothing is buffered beyond one member.
+    Unreadable or vanished files are simply not yielded.  Close the
+    generator (e.g. with contextlib.closing) to stop early; the ssh child is
+    then killed.
+    """
+    wanted = {fp.lstrip("/"): fp for fp in filepaths}
+    proc = subprocess.Popen(argv + ["tar --null -cf - -C / -T - 2>/dev/null"],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL,
+                            start_new_session=start_new_session)
+
+    # Feed names from a thread: tar starts emitting before it has read
+    # them all, and a full stdout pipe would otherwise deadlock.
+    def _feed():
+        try:
+            proc.stdin.write(b"\0".join(n.encode() for n in wanted))
+            proc.stdin.close()
+        except OSError:
+            pass
+    feeder = threading.Thread(target=_feed, daemon=True)
+    feeder.start()
+
+    try:
+        with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+            for member in tar:
+                path = wanted.get(member.name)
+                if path is None or not member.isfile():
+                    continue
+                f = tar.extractfile(member)
+                if f:
+                    yield path, member, f.read()
+        feeder.join()
+        proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
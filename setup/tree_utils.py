@@ -0,0 +1,39 @@
+# gpt_helper/dev/setup/tree_utils.py
+"""
+Lazily filled ttk.Treeview directories, shared by the file selection GUI and
+the setup wizard's local and remote trees. Kept free of Tk imports: the
+helper only calls methods on the tree it is given.
+"""
+
+
+class LazyTreeChildren:
+    """
+    Directory rows of *tree* whose children are inserted on first open.
+    Until then such a row holds a single placeholder row, which keeps the
+    expand arrow, so only the parts of the tree the user actually browses
+    become widgets. *fill(item, data)* inserts the real child rows of
+    *item*; *pending* (item -> data) may be shared with the caller.
+    """
+
+    def __init__(self, tree, fill, pending=None):
+        self.tree = tree
+        self.fill = fill
+        self.pending = {} if pending is None else pending
+        tree.bind("<<TreeviewOpen>>", self._on_open)
+
+    def add_placeholder(self, item, data):
+        """Give *item* a placeholder row; *data* is handed to fill on open"""
+        self.tree.insert(item, "end", text="...")
+        self.pending[item] = data
+
+    def load(self, item):
+        """Replace *item*'s placeholder with its real child rows, if pending"""
+        data = self.pending.pop(item, None)
+        if data is None:
+            return
+        self.tree.delete(*self.tree.get_children(item))
+        self.fill(item, data)
+
+    def _on_open(self, event):
+        # Treeview focuses the item before generating <<TreeviewOpen>>
+        self.load(self.tree.focus())
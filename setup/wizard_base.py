@@ -11,6 +11,8 @@ from datetime import datetime
 import threading
 from typing import Dict, List, Tuple, Optional, Any
 
+from setup.json_utils import load_file, dump_file
+
 class WizardStep(ABC):
     """Base class for wizard steps"""
     
@@ -86,8 +88,7 @@ class SetupWizard:
         """Load existing configuration or create new"""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
+                return load_file(self.config_file)
             except:
                 pass
         return {
@@ -107,8 +108,7 @@ class SetupWizard:
                         bf.write(f.read())
             
             # Save new config
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            dump_file(self.config, self.config_file, indent=True)
         except Exception as e:
             messagebox.showerror("Save Error", f"Failed to save configuration: {e}")
     
@@ -239,6 +239,7 @@ class SetupWizard:
             anchor="nw"
         )
         
+        self._scroll_after = None
         self.content_frame.bind("<Configure>", self._on_frame_configure)
         
         # Navigation
@@ -596,6 +597,14 @@ class SetupWizard:
     
     def _on_frame_configure(self, event):
         """Update scroll region when frame size changes"""
+        # Building a step resizes the frame once per widget packed into it;
+        # coalesce that burst into a single scroll-region update
+        if self._scroll_after is not None:
+            self.root.after_cancel(self._scroll_after)
+        self._scroll_after = self.root.after(50, self._update_scroll_region)
+    
+    def _update_scroll_region(self):
+        self._scroll_after = None
         self.content_canvas.configure(scrollregion=self.content_canvas.bbox("all"))
 
 # Utility functions for common UI patterns
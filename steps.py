@@ -1,9 +1,14 @@
 # gpt_helper/dev/steps.py
 import os
-import subprocess
 import tempfile
-from setup.constants import INSTRUCTIONS_DIR
-from tree import custom_tree
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from functools import lru_cache
+from setup.constants import INSTRUCTIONS_DIR, INSTRUCTION_PATHS
+from setup.json_utils import load_file, dump_file
+from setup.ssh_utils import iter_tar_files, ssh_argv
+from tree import iter_custom_tree
 
 # ---------------------------------------------------------------------------
 # Remote directory helper
@@ -21,30 +26,147 @@ def custom_remote_tree(root_path: str, ssh_cmd: str,
     if blacklist:
         tree_dict = filter_tree_dict(tree_dict, root_path, blacklist, root_path)
 
-    def recurse(d, pref):
-        out = []
-        keys = sorted(d.keys())
-        for idx, name in enumerate(keys):
-            connector = "├── " if idx < len(keys)-1 else "└── "
-            out.append(pref + connector + name)
-            if d[name]:
-                ext = "│   " if idx < len(keys)-1 else "    "
-                out.extend(recurse(d[name], pref + ext))
-        return out
-
-    return recurse(tree_dict, prefix)
+    # Depth-first over the nested dict with an explicit stack (as in
+    # tree._tree_lines): one list built in place, rather than a call and a
+    # child list copied into its parent's for every directory level
+    out = []
+    keys = sorted(tree_dict)
+    # (subtree, remaining (index, name) pairs, index of the last name, line prefix)
+    stack = [(tree_dict, iter(enumerate(keys)), len(keys) - 1, prefix)]
+    append = out.append
+    while stack:
+        d, names, last, pref = stack[-1]
+        mid, end = pref + "├── ", pref + "└── "
+        for idx, name in names:
+            append((end if idx == last else mid) + name)
+            sub = d[name]
+            if sub:
+                ext = "    " if idx == last else "│   "
+                keys = sorted(sub)
+                # Descend now; this level's remaining names resume after
+                stack.append((sub, iter(enumerate(keys)), len(keys) - 1, pref + ext))
+                break
+        else:
+            stack.pop()
+    return out
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+# path -> (st_mtime_ns, st_size, text). step1 runs again after the GUI
+# closes, so unchanged instruction and output files are read only once.
+_FILE_CACHE: dict[str, tuple[int, int, str]] = {}
+
+def _read_cached(fp: str) -> str:
+    """Contents of *fp* ('' if unreadable), reused while mtime/size match"""
+    try:
+        st = os.stat(fp)
+    except OSError:
+        return ""
+    hit = _FILE_CACHE.get(fp)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    txt = _read_text_raw(fp, st.st_size)
+    if txt is None:
+        return ""
+    _FILE_CACHE[fp] = (st.st_mtime_ns, st.st_size, txt)
+    return txt
+
+def _read_text_raw(fp: str, size: int | None = None):
+    """
+    Read *fp* with raw os.read calls sized from its stat (normally a single
+    syscall), decode once, and apply text mode's universal-newline
+    translation. None if the file cannot be read.
+    """
+    try:
+        fd = os.open(fp, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        if size is None:
+            size = os.fstat(fd).st_size
+        chunks = []
+        want = size + 1                 # + 1 so EOF shows up on the first read
+        while True:
+            chunk = os.read(fd, want)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            want = 1 << 16              # file grew since the stat
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+    data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    txt = data.decode("utf-8", "replace")
+    if "\r" in txt:
+        txt = txt.replace("\r\n", "\n").replace("\r", "\n")
+    return txt
+
 def _read_local(fname: str) -> str:
-    fp = os.path.join(INSTRUCTIONS_DIR, fname)
+    fp = INSTRUCTION_PATHS.get(fname) or os.path.join(INSTRUCTIONS_DIR, fname)
+    return _read_cached(fp)
+
+@lru_cache(maxsize=None)
+def _abspath_cached(path: str) -> str:
+    return os.path.abspath(path)
+
+def abs_project_root(config: dict) -> str:
+    """Absolute project root, resolved once per distinct configured value"""
+    return _abspath_cached(config.get("project_root") or os.getcwd())
+
+# Below this many local files a pool costs more than it saves: starting the
+# workers takes ~0.2 ms, while a small file already in the page cache reads
+# in a few microseconds (step1's handful of .env / docker-compose.yml /
+# nginx.conf style output files, say)
+_LOCAL_POOL_MIN = 8
+
+def _map_files(fn, paths: list, max_workers: int = 16, pool_min: int = 2) -> list:
+    """
+    fn over paths on a thread pool (results in input order). Reads release
+    the GIL, so per-file open/read latency overlaps instead of adding up.
+    Fewer than *pool_min* paths are simply mapped in this thread.
+    """
+    if len(paths) < pool_min:
+        return [fn(p) for p in paths]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as ex:
+        return list(ex.map(fn, paths))
+
+def _read_remote(ssh_cmd: str, paths: list) -> list:
+    """
+    Contents of the remote *paths* in input order, None where a file cannot
+    be read. All of them come through one ssh session (a tar stream, see
+    iter_tar_files) riding the shared multiplexed connection, instead of a
+    connection per file.
+    """
+    if not paths or not ssh_cmd:
+        return [None] * len(paths)
+    found = {}
     try:
-        with open(fp, "r") as f:
-            return f.read()
+        for fp, _member, data in iter_tar_files(ssh_argv(ssh_cmd), paths):
+            txt = data.decode("utf-8", "replace")
+            if "\r" in txt:
+                txt = txt.replace("\r\n", "\n").replace("\r", "\n")
+            found[fp] = txt
     except Exception:
-        return ""
+        # Whatever arrived before the stream broke is kept
+        pass
+    return [found.get(fp) for fp in paths]
+
+def _read_segment_files(config: dict, seg: dict, selected: list) -> list[str]:
+    """Stripped contents of the selected files; unreadable files are skipped"""
+    if seg.get("is_remote"):
+        texts = _read_remote(config.get("ssh_command", ""), selected)
+    else:
+        # open() reports a missing file itself; no separate stat
+        texts = _map_files(_read_text_raw, selected, pool_min=_LOCAL_POOL_MIN)
+    return [txt.rstrip() for txt in texts if txt is not None]
+
+def _segment_texts(config: dict, seg: dict, selected: list, read_local=None):
+    if read_local is not None and selected and not seg.get("is_remote"):
+        return read_local(selected)
+    return _read_segment_files(config, seg, selected)
 
 def _write_temp(txt: str) -> str:
     tf = tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".txt")
@@ -52,6 +174,138 @@ def _write_temp(txt: str) -> str:
     tf.close()
     return tf.name
 
+# Remote roots: (root, ssh_cmd, blacklist) -> (built_at, lines), reused for
+# up to _TREE_TTL seconds within a run. main() drops the remote trees once
+# the selection GUI closes (files may have been added meanwhile), so the
+# step1 regenerated then lists the remote roots afresh. Local roots skip
+# this layer: their cached trees are checked against every directory's
+# mtime in _local_tree_lines.
+_TREE_CACHE: dict[tuple, tuple[float, list[str]]] = {}
+_TREE_TTL = 60.0
+_TREE_CACHE_MAX = 32
+
+# Local trees also persist between runs, next to RemoteFileOptimizer's cache:
+# "root\nblacklist..." -> {"dirs": {dir: st_mtime_ns}, "lines": [...]}. A
+# directory's mtime changes whenever an entry is added, removed or renamed
+# in it, so if every listed directory still has its recorded mtime, the
+# tree is unchanged; checking costs one stat per directory instead of a
+# listing, and the most recent few trees are kept.
+# Remote trees are stored as "ssh_cmd:root\nblacklist..." -> {"ts": built
+# at, "lines": [...]}. Their directories cannot be stat'ed without the very
+# ssh round trip being saved, so they are simply reused for
+# _REMOTE_TREE_TTL seconds (or until --clear-cache).
+_TREE_DISK_CACHE = os.path.join(tempfile.gettempdir(), "gpt_helper_cache", "tree_cache.json")
+_TREE_DISK_MAX = 8
+_REMOTE_TREE_TTL = 300.0
+_disk_trees = None
+
+def _load_disk_trees() -> dict:
+    global _disk_trees
+    if _disk_trees is None:
+        try:
+            _disk_trees = load_file(_TREE_DISK_CACHE)
+        except (OSError, ValueError):
+            _disk_trees = {}
+        if not isinstance(_disk_trees, dict):
+            _disk_trees = {}
+    return _disk_trees
+
+def _stamps_unchanged(stamps: dict) -> bool:
+    for path, mtime in stamps.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+def _store_disk_tree(trees: dict, key: str, entry: dict, changed: bool):
+    # Re-inserted so the dict stays in least- to most-recently-used order
+    trees[key] = entry
+    while len(trees) > _TREE_DISK_MAX:
+        del trees[next(iter(trees))]
+    if changed:
+        try:
+            os.makedirs(os.path.dirname(_TREE_DISK_CACHE), exist_ok=True)
+            dump_file(trees, _TREE_DISK_CACHE, atomic=True)
+        except OSError:
+            pass
+
+def _local_tree_lines(root: str, bl: list) -> list[str]:
+    """Tree lines of local *root*, from the disk cache while it is current"""
+    key = "\n".join([root, *bl])
+    trees = _load_disk_trees()
+    hit = trees.pop(key, None)
+    if hit is not None and _stamps_unchanged(hit.get("dirs", {})):
+        lines = hit.get("lines", [])
+    else:
+        hit = None
+        stamps = {}
+        lines = list(iter_custom_tree(root, "", 1, 999, bl, root, stamps))
+    _store_disk_tree(trees, key, hit or {"dirs": stamps, "lines": lines}, hit is None)
+    return lines
+
+def _remote_tree_lines(root: str, ssh_cmd: str, bl: list) -> list[str]:
+    """Tree lines of remote *root*, from the disk cache while it is fresh"""
+    key = "\n".join([f"{ssh_cmd}:{root}", *bl])
+    trees = _load_disk_trees()
+    hit = trees.pop(key, None)
+    if hit is not None and 0 <= time.time() - hit.get("ts", 0) < _REMOTE_TREE_TTL:
+        lines = hit.get("lines", [])
+    else:
+        hit = None
+        lines = custom_remote_tree(root, ssh_cmd, "", 1, 999, bl)
+        if not lines:
+            # Nothing listed usually means ssh failed; don't keep that
+            return lines
+    _store_disk_tree(trees, key, hit or {"ts": time.time(), "lines": lines}, hit is None)
+    return lines
+
+def clear_tree_cache(remote_only: bool = False):
+    """
+    Forget all cached directory trees, in memory and on disk. With
+    *remote_only*, local trees are kept: they are revalidated against
+    their directories' mtimes anyway.
+    """
+    global _disk_trees
+    _TREE_CACHE.clear()
+    if remote_only:
+        trees = _load_disk_trees()
+        remote = [key for key, entry in trees.items() if "ts" in entry]
+        if remote:
+            for key in remote:
+                del trees[key]
+            try:
+                dump_file(trees, _TREE_DISK_CACHE, atomic=True)
+            except OSError:
+                pass
+        return
+    _disk_trees = {}
+    try:
+        os.remove(_TREE_DISK_CACHE)
+    except OSError:
+        pass
+
+def _root_tree_lines(config: dict, root: str, is_remote: bool):
+    """The root path followed by its (blacklist-filtered) tree lines"""
+    bl = config.get("blacklist", {}).get(root, [])
+    if not is_remote:
+        return chain([root], _local_tree_lines(root, bl))
+    ssh_cmd = config.get("ssh_command", "")
+    key = (root, ssh_cmd, tuple(bl))
+    now = time.monotonic()
+    hit = _TREE_CACHE.get(key)
+    if hit is not None and now - hit[0] < _TREE_TTL:
+        lines = hit[1]
+    else:
+        lines = _remote_tree_lines(root, ssh_cmd, bl)
+        _TREE_CACHE.pop(key, None)
+        if len(_TREE_CACHE) >= _TREE_CACHE_MAX:
+            # dicts keep insertion order: drop the oldest build
+            del _TREE_CACHE[next(iter(_TREE_CACHE))]
+        _TREE_CACHE[key] = (now, lines)
+    return chain([root], lines)
+
 # ---------------------------------------------------------------------------
 # STEP 1  –  build "setup" text block
 # ---------------------------------------------------------------------------
@@ -76,72 +330,48 @@ def step1(config: dict) -> str:
     # ---------------- directory-tree(s) -----------------------
     if config.get("has_single_root"):
         root = config["project_root"]
-        if config.get("system_type") == "remote":
-            ssh = config.get("ssh_command", "")
-            bl  = config.get("blacklist", {}).get(root, [])
-            lines = [root] + custom_remote_tree(root, ssh, "", 1, 999, bl)
-        else:
-            bl  = config.get("blacklist", {}).get(root, [])
-            lines = [root] + custom_tree(root, "", 1, 999, bl, root)
-        tree_text = "\n".join(lines)
+        tree_text = "\n".join(
+            _root_tree_lines(config, root, config.get("system_type") == "remote"))
     else:
-        seg_chunks = []
-        for seg in config.get("directories", []):
-            seg_root = seg["directory"]
-            seg_chunks.append(f"Segment: {seg['name']} => {seg_root}")
-            if seg.get("is_remote"):
-                ssh = config.get("ssh_command", "")
-                bl  = config.get("blacklist", {}).get(seg_root, [])
-                seg_lines = [seg_root] + custom_remote_tree(seg_root, ssh, "", 1, 999, bl)
-            else:
-                bl  = config.get("blacklist", {}).get(seg_root, [])
-                seg_lines = [seg_root] + custom_tree(seg_root, "", 1, 999, bl, seg_root)
-            seg_chunks.extend(seg_lines)
-            seg_chunks.append("")
-        tree_text = "\n".join(seg_chunks)
+        # One block per segment, separated by a blank line
+        tree_text = "\n\n".join(
+            "\n".join(chain([f"Segment: {seg['name']} => {seg['directory']}"],
+                            _root_tree_lines(config, seg["directory"], seg.get("is_remote"))))
+            for seg in config.get("directories", []))
 
     # ---------------- assemble core section -------------------
-    parts = []
-    if background.strip():   parts.append(background.rstrip())
-    if tree_text.strip():    parts.append(tree_text.rstrip())
-    if rules.strip():        parts.append(rules.rstrip())
-    if current_goal.strip(): parts.append(current_goal.rstrip())
-    txt = "\n\n".join(parts) + "\n\n"
+    # rstrip() is empty exactly when strip() would be, so one pass per
+    # section both tests and trims it (the tree text can be large)
+    parts = [s for s in (background.rstrip(), tree_text.rstrip(),
+                         rules.rstrip(), current_goal.rstrip()) if s]
 
     # ---------------- append extra files ----------------------
     def _cat_local(fp):
-        try:
-            with open(fp, "r", encoding="utf-8", errors="replace") as f:
-                return f.read().rstrip()
-        except Exception:
-            return ""
-    def _cat_remote(ssh_cmd, fp):
-        try:
-            proc = subprocess.run(ssh_cmd.split()+["cat", fp], capture_output=True, text=True)
-            return proc.stdout.rstrip() if proc.returncode == 0 else ""
-        except Exception:
-            return ""
+        return _read_cached(fp).rstrip()
+    def _cat_remote_all(fps):
+        return [(txt or "").rstrip()
+                for txt in _read_remote(config.get("ssh_command", ""), fps)]
 
     extras = []
     if config.get("has_single_root"):
-        for fp in config.get("project_output_files", []):
-            extras.append(
-                _cat_remote(config.get("ssh_command",""), fp)
-                if config.get("system_type") == "remote"
-                else _cat_local(fp)
-            )
+        fps = config.get("project_output_files", [])
+        if config.get("system_type") == "remote":
+            extras = _cat_remote_all(fps)
+        else:
+            extras = _map_files(_cat_local, fps, pool_min=_LOCAL_POOL_MIN)
     else:
         for seg in config.get("directories", []):
-            for fp in seg.get("output_files", []):
-                extras.append(
-                    _cat_remote(config.get("ssh_command",""), fp)
-                    if seg.get("is_remote")
-                    else _cat_local(fp)
-                )
+            fps = seg.get("output_files", [])
+            if seg.get("is_remote"):
+                extras.extend(_cat_remote_all(fps))
+            else:
+                extras.extend(_map_files(_cat_local, fps, pool_min=_LOCAL_POOL_MIN))
+    # Everything is joined exactly once; the tree text can be large, and
+    # each `+` on the accumulated string would copy all of it again
+    out = ["\n\n".join(parts), "\n\n"]
     if extras:
-        txt += "Project Output Files:\n\n" + "\n\n".join([e for e in extras if e]) + "\n"
-
-    return txt
+        out += ["Project Output Files:\n\n", "\n\n".join([e for e in extras if e]), "\n"]
+    return "".join(out)
 
 # ---------------------------------------------------------------------------
 # STEP 2  –  collect file-content per segment
@@ -156,11 +386,22 @@ def step2_all_segments(config: dict) -> str:
     NOTE: This function passes the config to the GUI so that any edits made
     in the Edit Config tab are reflected in the config used by step1.
     """
+    return "\n\n\n".join("\n\n".join(t) for t in step2_segment_texts(config))
+
+def step2_segment_texts(config: dict, read_local=None) -> list:
+    """
+    Same as step2_all_segments, but return the file texts of each non-empty
+    segment as a list instead of joining them, so callers can stream the
+    output without building one large string.
+    
+    If *read_local* is given, local segments are ``read_local(selected)``
+    instead, e.g. a lazy stream that reads files while the output is being
+    written; such segments may turn out empty.
+    """
     from gui import gui_selection
-    from setup.content_setup import is_rel_path_blacklisted
 
     blobs = []
-    project_root = os.path.abspath(config.get("project_root", os.getcwd()))
+    project_root = abs_project_root(config)
     color_cycle = ["#e6f3ff", "#f0e6ff", "#e6ffe6", "#ffffe6", "#ffe6e6"]
 
     # If single root, we only need one GUI window
@@ -187,25 +428,9 @@ def step2_all_segments(config: dict) -> str:
         
         seg["output_files"] = selected
 
-        seg_texts = []
-        for fp in selected:
-            if seg.get("is_remote"):
-                try:
-                    proc = subprocess.run(config.get("ssh_command","").split()+["cat", fp],
-                                          capture_output=True, text=True)
-                    if proc.returncode == 0:
-                        seg_texts.append(proc.stdout.rstrip())
-                except Exception:
-                    pass
-            else:
-                if os.path.exists(fp):
-                    try:
-                        with open(fp, "r", encoding="utf-8", errors="replace") as f:
-                            seg_texts.append(f.read().rstrip())
-                    except Exception:
-                        pass
+        seg_texts = _segment_texts(config, seg, selected, read_local)
         if seg_texts:
-            blobs.append("\n\n".join(seg_texts))
+            blobs.append(seg_texts)
     else:
         # Multiple segments
         for idx, seg in enumerate(config.get("directories", [])):
@@ -223,24 +448,8 @@ def step2_all_segments(config: dict) -> str:
             )
             seg["output_files"] = selected
 
-            seg_texts = []
-            for fp in selected:
-                if seg.get("is_remote"):
-                    try:
-                        proc = subprocess.run(config.get("ssh_command","").split()+["cat", fp],
-                                              capture_output=True, text=True)
-                        if proc.returncode == 0:
-                            seg_texts.append(proc.stdout.rstrip())
-                    except Exception:
-                        pass
-                else:
-                    if os.path.exists(fp):
-                        try:
-                            with open(fp, "r", encoding="utf-8", errors="replace") as f:
-                                seg_texts.append(f.read().rstrip())
-                        except Exception:
-                            pass
+            seg_texts = _segment_texts(config, seg, selected, read_local)
             if seg_texts:
-                blobs.append("\n\n".join(seg_texts))
+                blobs.append(seg_texts)
 
-    return "\n\n\n".join(blobs)
\ No newline at end of file
+    return blobs
\ No newline at end of file
@@ -1,7 +1,10 @@
 # gpt_helper/dev/tree.py
 
 import os
-from setup.content_setup import is_rel_path_blacklisted  # Added for consistent blacklist checking
+from setup.blacklist_utils import blacklist_matcher  # Added for consistent blacklist checking
+
+ENABLE_FILES = frozenset({".env", ".env.local"})
+_ALLOWED_HIDDEN = frozenset(name.lower() for name in ENABLE_FILES)
 
 def custom_tree(directory, prefix="", level=1, max_level=999, blacklist=None, base_path=None):
     """
@@ -14,37 +17,88 @@ def custom_tree(directory, prefix="", level=1, max_level=999, blacklist=None, ba
     any file or directory whose relative path (computed from base_path) is blacklisted
     will be omitted.
     """
-    ENABLE_FILES = {".env", ".env.local"}
-    result_lines = []
+    return list(iter_custom_tree(directory, prefix, level, max_level, blacklist, base_path))
+
+def iter_custom_tree(directory, prefix="", level=1, max_level=999, blacklist=None, base_path=None,
+                     dir_stamps=None):
+    """
+    Generator form of custom_tree: yields the same lines one at a time, so
+    callers can join or write them without an intermediate list.
+    
+    If *dir_stamps* is a dict, the st_mtime_ns of every directory listed is
+    recorded in it (-1 if it cannot be stat'ed), taken just before the
+    listing. While none of those change, the output cannot change either.
+    """
     if level > max_level:
-        return result_lines
+        return
     if base_path is None:
         base_path = directory
+    rel = os.path.relpath(directory, base_path)
+    rel_prefix = "" if rel == "." else rel + os.sep
+    bl_match = blacklist_matcher(blacklist) if blacklist else None
+    yield from _tree_lines(directory, rel_prefix, prefix, level, max_level, bl_match, dir_stamps)
+
+def _by_name(item):
+    return item[0].name
+
+def _kept_entries(directory, rel_prefix, bl_match, dir_stamps=None):
+    """
+    The entries of one directory that the tree shows, as (DirEntry, is_dir)
+    in name order. os.scandir gives each entry's type from the directory
+    listing itself, so only symlinks cost an extra stat.
+    """
+    if dir_stamps is not None:
+        try:
+            dir_stamps[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            dir_stamps[directory] = -1
+    kept = []
     try:
-        entries = sorted(os.listdir(directory))
-    except Exception:
-        return result_lines
-    allowed_hidden = {name.lower() for name in ENABLE_FILES}
-    entries_filtered = []
-    for entry in entries:
-        full_path = os.path.join(directory, entry)
-        # Apply blacklist filtering if a blacklist is provided.
-        if blacklist:
-            rel = os.path.relpath(full_path, base_path).strip(os.sep)
-            if is_rel_path_blacklisted(rel, blacklist):
-                continue
-        if os.path.isdir(full_path):
-            entries_filtered.append(entry)
+        with os.scandir(directory) as it:
+            # Filter while listing, then sort only what is kept, in place
+            for entry in it:
+                name = entry.name
+                # Apply blacklist filtering if a blacklist is provided.
+                if bl_match is not None and bl_match(rel_prefix + name):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir and name.startswith('.') and name.lower() not in _ALLOWED_HIDDEN:
+                    continue
+                kept.append((entry, is_dir))
+    except OSError:
+        return []
+    kept.sort(key=_by_name)
+    return kept
+
+def _tree_lines(directory, rel_prefix, prefix, level, max_level, bl_match, dir_stamps=None):
+    """
+    custom_tree's depth-first walk, driven by an explicit stack of open
+    directory listings rather than recursion: no Python frame per directory
+    and no recursion limit on deeply nested trees. The relative path is
+    carried down instead of recomputed per entry.
+    """
+    if level > max_level:
+        return
+    kept = _kept_entries(directory, rel_prefix, bl_match, dir_stamps)
+    # (remaining entries, index of the last entry, line prefix, rel prefix, level)
+    stack = [(iter(enumerate(kept)), len(kept) - 1, prefix, rel_prefix, level)]
+    while stack:
+        entries, last, prefix, rel_prefix, level = stack[-1]
+        # Connector strings joined to the prefix once per directory, so each
+        # line is a single concatenation
+        mid, end = prefix + "├── ", prefix + "└── "
+        for i, (entry, is_dir) in entries:
+            yield (end if i == last else mid) + entry.name
+            if is_dir and level < max_level:
+                extension = "    " if i == last else "│   "
+                child_rel = rel_prefix + entry.name + os.sep
+                child = _kept_entries(entry.path, child_rel, bl_match, dir_stamps)
+                # Descend now; this directory's remaining entries resume after
+                stack.append((iter(enumerate(child)), len(child) - 1,
+                              prefix + extension, child_rel, level + 1))
+                break
         else:
-            if entry.startswith('.') and entry.lower() not in allowed_hidden:
-                continue
-            entries_filtered.append(entry)
-    count = len(entries_filtered)
-    for i, entry in enumerate(entries_filtered):
-        full_path = os.path.join(directory, entry)
-        connector = "├── " if i < count - 1 else "└── "
-        result_lines.append(prefix + connector + entry)
-        if os.path.isdir(full_path):
-            extension = "│   " if i < count - 1 else "    "
-            result_lines.extend(custom_tree(full_path, prefix + extension, level + 1, max_level, blacklist=blacklist, base_path=base_path))
-    return result_lines
+            stack.pop()